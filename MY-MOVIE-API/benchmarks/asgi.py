@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+# Utilidades comunes de los benchmarks: cliente ASGI en proceso, generador de carga, medición de tiempos y
+# ejecución de cada configuración en un proceso aparte
+
+# Película válida para las altas y modificaciones de los benchmarks
+MOVIE = {"title": "Pelicula", "overview": "Una descripcion de prueba", "year": 2000, "rating": 7.5, "category": "Accion"}
+
+
+async def call(app, method: str, path: str, headers: dict = None, body=None, query: str = ""):
+    # Cliente ASGI mínimo en proceso: evita red y dependencias extra (httpx) en las mediciones
+    payload = b""
+    headers = dict(headers or {})
+    if body is not None:
+        payload = json.dumps(body).encode()
+        headers.setdefault("content-type", "application/json")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(key.lower().encode(), str(value).encode()) for key, value in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # El cliente nunca se desconecta: se espera hasta que la respuesta termine
+        await asyncio.Event().wait()
+
+    response = {"status": None, "headers": {}, "body": bytearray()}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {key.decode(): value.decode() for key, value in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Ejecuta el startup/shutdown de la aplicación (protocolo lifespan de ASGI), como haría uvicorn
+    messages = asyncio.Queue()
+    replies = asyncio.Queue()
+    await messages.put({"type": "lifespan.startup"})
+
+    async def send(message):
+        await replies.put(message)
+
+    task = asyncio.ensure_future(app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, messages.get, send))
+    reply = await replies.get()
+    if reply["type"] != "lifespan.startup.complete":
+        raise RuntimeError(reply.get("message", "lifespan startup failed"))
+    try:
+        yield
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        await replies.get()
+        await task
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(make_request, total: int, concurrency: int) -> dict:
+    # make_request(i) es una corrutina que hace una petición; se lanzan `concurrency` clientes en paralelo
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def client():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - started)
+            if response["status"] >= 500:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_second": round(total / elapsed, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def timed(run, arguments) -> dict:
+    # Llama a run(argument) para cada argumento y resume las duraciones en milisegundos
+    samples = []
+    for argument in arguments:
+        started = time.perf_counter()
+        run(argument)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "mean_ms": round(statistics.mean(samples), 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+def run_worker(module: str, argv: list, env: dict = None, prepare=None):
+    # La configuración (DB_MODE, perfil de pragmas, WRITE_BATCH...) se lee al importar la aplicación, así que
+    # cada combinación se mide en un proceso nuevo: `python -m module --worker *argv` sobre una base de datos
+    # temporal (prepare(ruta) puede copiar antes un dataset). El worker imprime su resultado en JSON en la
+    # última línea de la salida.
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.sqlite")
+        if prepare is not None:
+            prepare(database)
+        output = subprocess.run(
+            [sys.executable, "-m", module, "--worker", *argv],
+            env={**os.environ, **(env or {}), "DATABASE_PATH": database}, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.splitlines()[-1])
@@ -0,0 +1,72 @@
+# Coste de la autenticación JWTBearer por petición con y sin la caché de tokens verificados:
+#
+#     python -m benchmarks.auth --iterations 50000
+import argparse
+import asyncio
+import json
+import time
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse
+
+from benchmarks.asgi import call, run_load
+from config.database import engine
+from config.migrations import run_migrations
+from middlewares.jwt_bearer import JWTBearer
+from utils.jwt_manager import create_token, token_cache, validate_token
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get('/public')
+    async def public():
+        return JSONResponse(content={"message": "ok"})
+
+    @app.get('/private', dependencies=[Depends(JWTBearer())])
+    async def private():
+        return JSONResponse(content={"message": "ok"})
+
+    return app
+
+
+async def bench(args) -> None:
+    # Sin caché, cada verificación consulta revoked_tokens
+    run_migrations(engine)
+    token = create_token({"email": "admin@gmail.com", "password": "root"})
+    headers = {"authorization": f"Bearer {token}"}
+    app = build_app()
+    cache_size = token_cache.maxsize
+
+    for cached in (False, True):
+        token_cache.clear()
+        token_cache.maxsize = cache_size if cached else 0
+
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            validate_token(token)
+        validate_us = (time.perf_counter() - started) / args.iterations * 1e6
+
+        public = await run_load(lambda i: call(app, "GET", "/public"), args.requests, args.concurrency)
+        private = await run_load(lambda i: call(app, "GET", "/private", headers=headers), args.requests, args.concurrency)
+        print(json.dumps({
+            "token_cache": cached,
+            "validate_token_us": round(validate_us, 2),
+            "public_mean_ms": public["mean_ms"],
+            "private_mean_ms": private["mean_ms"],
+            "auth_overhead_us": round((private["mean_ms"] - public["mean_ms"]) * 1000, 1),
+            "private_requests_per_second": private["requests_per_second"],
+        }))
+    token_cache.maxsize = cache_size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=50000)
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=1)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
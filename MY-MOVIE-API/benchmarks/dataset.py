@@ -0,0 +1,59 @@
+# Datasets sintéticos y reproducibles para los benchmarks (catálogo de utils.catalog). Cada tamaño se
+# genera una sola vez por semilla en benchmarks/.datasets/ y cada ejecución trabaja sobre una copia, así
+# las escrituras no lo alteran:
+#
+#     python -m benchmarks.dataset 100k --seed 42
+import argparse
+import os
+import shutil
+import time
+
+from utils.catalog import generate_movies, load_catalog
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DATASETS_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), ".datasets")
+
+
+def dataset_path(size: str, seed: int) -> str:
+    return os.path.join(DATASETS_DIR, f"movies-{size}-{seed}.sqlite")
+
+
+def build_dataset(size: str, seed: int) -> str:
+    path = dataset_path(size, seed)
+    if os.path.exists(path):
+        return path
+    os.makedirs(DATASETS_DIR, exist_ok=True)
+    partial = path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    # Esquema completo (índices, FTS, triggers) creado por las migraciones de la propia aplicación
+    from sqlalchemy import create_engine
+    from config.migrations import run_migrations
+    engine = create_engine(f"sqlite:///{partial}")
+    run_migrations(engine)
+    engine.dispose()
+
+    load_catalog(partial, generate_movies(SIZES[size], seed))
+    os.replace(partial, path)
+    return path
+
+
+def copy_dataset(size: str, seed: int, destination: str) -> str:
+    shutil.copyfile(build_dataset(size, seed), destination)
+    return destination
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("sizes", nargs="+", choices=SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    for size in args.sizes:
+        started = time.perf_counter()
+        path = build_dataset(size, args.seed)
+        print(f"{path} ({time.perf_counter() - started:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Compara DB_MODE=sync (Session en el threadpool) con DB_MODE=async (AsyncSession sobre aiosqlite)
+# bajo carga concurrente. Cada modo corre en su propio proceso con una base de datos temporal:
+#
+#     python -m benchmarks.db_modes --movies 2000 --requests 5000 --concurrency 50 100 200
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+
+from benchmarks.asgi import MOVIE, call, lifespan, run_load, run_worker
+
+
+async def worker(args) -> list:
+    logging.disable(logging.CRITICAL)
+    from main import app
+    from utils.jwt_manager import create_token
+
+    async with lifespan(app):
+        headers = {"authorization": f"Bearer {create_token({'email': 'admin@gmail.com', 'password': 'root'})}"}
+        await call(app, "POST", "/movies/bulk", body=[MOVIE] * args.movies)
+        rng = random.Random(0)
+
+        async def read(i):
+            if i % 5 == 0:
+                return await call(app, "GET", "/movies", headers=headers, query="limit=50")
+            return await call(app, "GET", f"/movies/{rng.randint(1, min(args.movies, 2000))}")
+
+        results = []
+        for concurrency in args.concurrency:
+            stats = await run_load(read, args.requests, concurrency)
+            results.append({"mode": os.environ["DB_MODE"], **stats})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(worker(args))))
+        return
+
+    for mode in ("sync", "async"):
+        for row in run_worker("benchmarks.db_modes", sys.argv[1:], {"DB_MODE": mode}):
+            print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
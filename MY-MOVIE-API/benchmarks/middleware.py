@@ -0,0 +1,61 @@
+# Peticiones por segundo de una aplicación mínima sin middleware, con ErrorHandler (ASGI puro) y con
+# el equivalente basado en BaseHTTPMiddleware que se usaba antes:
+#
+#     python -m benchmarks.middleware --requests 20000 --concurrency 50
+import argparse
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from benchmarks.asgi import call, run_load
+from middlewares.error_handler import ErrorHandler
+
+
+class BaseHTTPErrorHandler(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception as e:
+            return JSONResponse(status_code=500, content={'error': str(e)})
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware)
+
+    @app.get('/json')
+    async def json_route():
+        return JSONResponse(content={"message": "ok"})
+
+    @app.get('/stream')
+    async def stream_route():
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 1024
+        return StreamingResponse(chunks())
+
+    return app
+
+
+async def bench(args) -> None:
+    variants = {"none": None, "ErrorHandler": ErrorHandler, "BaseHTTPMiddleware": BaseHTTPErrorHandler}
+    for path in ("/json", "/stream"):
+        for name, middleware in variants.items():
+            app = build_app(middleware)
+            stats = await run_load(lambda i: call(app, "GET", path), args.requests, args.concurrency)
+            print(json.dumps({"route": path, "middleware": name, **stats}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(bench(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
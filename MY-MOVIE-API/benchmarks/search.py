@@ -0,0 +1,85 @@
+# Compara la búsqueda FTS5 (GET /movies/search) con un escaneo LIKE '%palabra%' sobre title y overview:
+#
+#     python -m benchmarks.search --movies 100000 --queries 200
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+
+from benchmarks.asgi import timed
+
+WORDS = [
+    "amor", "guerra", "dragon", "ciudad", "noche", "futuro", "robot", "familia", "viaje", "secreto",
+    "isla", "reino", "espacio", "venganza", "misterio", "tiempo", "fuego", "mar", "sombra", "hermanos",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_PATH"] = os.path.join(tmp.name, "bench.sqlite")
+    logging.disable(logging.CRITICAL)
+    from sqlalchemy import insert, or_, select
+    from config.database import Session, engine
+    from config.migrations import run_migrations
+    from models.movie import Movie as MovieModel
+    from services.movie import MovieService, build_match_query
+
+    run_migrations(engine)
+    rng = random.Random(0)
+    vocabulary = WORDS + [f"palabra{n}" for n in range(2000)]
+    rows = [
+        {
+            "title": " ".join(rng.choices(WORDS, k=3)),
+            "overview": " ".join(rng.choices(vocabulary, k=25)),
+            "year": rng.randint(1950, 2024),
+            "rating": round(rng.uniform(1, 10), 1),
+            "category": "Accion",
+        }
+        for _ in range(args.movies)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(MovieModel), rows)
+
+    # Palabras frecuentes (muchas coincidencias que rankear) y poco frecuentes (LIKE recorre casi toda la tabla)
+    term_sets = {
+        "common": [rng.choice(WORDS) for _ in range(args.queries)],
+        "rare": [f"palabra{rng.randrange(2000)}" for _ in range(args.queries)],
+    }
+    with Session() as db:
+        service = MovieService(db)
+
+        def fts(term):
+            service.search_movies(build_match_query(term), args.limit)
+
+        def like(term):
+            pattern = f"%{term}%"
+            query = select(MovieModel).where(or_(MovieModel.title.like(pattern), MovieModel.overview.like(pattern)))
+            db.execute(query.limit(args.limit)).scalars().all()
+
+        def like_all(term):
+            # LIKE no sabe ordenar por relevancia: para rankear hay que leer todas las coincidencias
+            pattern = f"%{term}%"
+            query = select(MovieModel).where(or_(MovieModel.title.like(pattern), MovieModel.overview.like(pattern)))
+            db.execute(query).scalars().all()
+
+        for name, terms in term_sets.items():
+            print(json.dumps({
+                "terms": name,
+                "movies": args.movies,
+                "fts5_bm25": timed(fts, terms),
+                "like_first_page": timed(like, terms),
+                "like_all_matches": timed(like_all, terms),
+            }))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
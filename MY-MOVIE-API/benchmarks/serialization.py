@@ -0,0 +1,71 @@
+# Coste de leer y serializar listados grandes: instancias ORM + jsonable_encoder + JSONResponse (camino
+# anterior) frente a filas Core + movie_list_adapter (pydantic-core). Comprueba además que los bytes
+# coinciden con JSONResponse(jsonable_encoder(filas)):
+#
+#     python -m benchmarks.serialization --rows 1000 10000 100000
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+
+from benchmarks.asgi import timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_PATH"] = os.path.join(tmp.name, "bench.sqlite")
+    logging.disable(logging.CRITICAL)
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import insert, select
+    from config.database import Session, engine
+    from config.migrations import run_migrations
+    from models.movie import Movie as MovieModel
+    from services.movie import MOVIE_COLUMNS
+    from utils.responses import movie_list_adapter
+
+    run_migrations(engine)
+    rng = random.Random(0)
+    with engine.begin() as connection:
+        connection.execute(insert(MovieModel), [
+            {
+                "title": f"Película {i}",
+                "overview": "Una descripción de prueba con acentos y eñes",
+                "year": rng.randint(1950, 2024),
+                "rating": round(rng.uniform(1, 10), 1),
+                "category": rng.choice(["Accion", "Drama", "Comedia"]),
+            }
+            for i in range(max(args.rows))
+        ])
+
+    with Session() as db:
+        for rows in args.rows:
+            def orm_path():
+                db.expunge_all()
+                result = db.execute(select(MovieModel).order_by(MovieModel.id).limit(rows)).scalars().all()
+                return JSONResponse(content=jsonable_encoder(result)).body
+
+            def core_path():
+                result = db.execute(select(*MOVIE_COLUMNS).order_by(MovieModel.id).limit(rows))
+                return movie_list_adapter.dump_json([row._asdict() for row in result])
+
+            core_rows = [row._asdict() for row in db.execute(select(*MOVIE_COLUMNS).order_by(MovieModel.id).limit(rows))]
+            identical = movie_list_adapter.dump_json(core_rows) == JSONResponse(content=jsonable_encoder(core_rows)).body
+            print(json.dumps({
+                "rows": rows,
+                "orm_jsonable_encoder_ms": timed(lambda _: orm_path(), range(args.repeat))["median_ms"],
+                "core_pydantic_core_ms": timed(lambda _: core_path(), range(args.repeat))["median_ms"],
+                "identical_bytes": identical,
+            }))
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Mide el rendimiento de lecturas y escrituras concurrentes con cada perfil de PRAGMA de SQLite.
+# Cada perfil corre en su propio proceso con una base de datos temporal:
+#
+#     python -m benchmarks.sqlite_pragmas --seconds 5 --readers 8 --writers 2
+import argparse
+import json
+import logging
+import random
+import sys
+import threading
+import time
+
+from benchmarks.asgi import MOVIE, run_worker
+
+
+def worker(args) -> dict:
+    logging.disable(logging.CRITICAL)
+    from sqlalchemy import insert, select
+    from config import settings
+    from config.database import Base, engine
+    from models.movie import Movie as MovieModel
+
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(MovieModel), [MOVIE] * args.movies)
+
+    deadline = time.perf_counter() + args.seconds
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(seed):
+        rng = random.Random(seed)
+        done = 0
+        with engine.connect() as connection:
+            while time.perf_counter() < deadline:
+                connection.execute(select(MovieModel).where(MovieModel.id == rng.randint(1, args.movies))).first()
+                connection.rollback()
+                done += 1
+        with lock:
+            counts["reads"] += done
+
+    def writer():
+        done = errors = 0
+        while time.perf_counter() < deadline:
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(MovieModel).values(**MOVIE))
+                done += 1
+            except Exception:
+                errors += 1
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        "profile": settings.sqlite_pragma_profile,
+        "readers": args.readers,
+        "writers": args.writers,
+        "reads_per_second": round(counts["reads"] / args.seconds, 1),
+        "writes_per_second": round(counts["writes"] / args.seconds, 1),
+        "write_errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return
+
+    from config.settings import sqlite_pragma_profiles
+    for profile in sqlite_pragma_profiles:
+        print(json.dumps(run_worker("benchmarks.sqlite_pragmas", sys.argv[1:], {"SQLITE_PRAGMA_PROFILE": profile})))
+
+if __name__ == "__main__":
+    main()
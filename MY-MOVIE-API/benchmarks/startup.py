@@ -0,0 +1,94 @@
+# Coste de arranque en frío de un worker: desglose de `python -X importtime -c "import main"` por paquete
+# y tiempo hasta la primera respuesta (proceso nuevo → import → lifespan → GET /). Cada medición usa un
+# proceso y una base de datos temporal nuevos; se toma la mediana. Termina con código 1 si la mediana
+# supera --budget-ms:
+#
+#     python -m benchmarks.startup --runs 5 --budget-ms 2000
+#     RUN_MIGRATIONS=0 python -m benchmarks.startup
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+import asyncio, json
+from main import app
+imported = time.perf_counter()
+from benchmarks.asgi import call, lifespan
+
+async def first_request():
+    async with lifespan(app):
+        ready = time.perf_counter()
+        response = await call(app, "GET", "/")
+        return ready, time.perf_counter(), response["status"]
+
+ready, answered, status = asyncio.run(first_request())
+print(json.dumps({
+    "status": status,
+    "import_ms": (imported - started) * 1000,
+    "lifespan_ms": (ready - imported) * 1000,
+    "first_request_ms": (answered - ready) * 1000,
+}))
+"""
+
+
+def import_breakdown(env: dict, top: int) -> dict:
+    # -X importtime escribe en stderr "self | acumulado | módulo"; la sangría del nombre indica la profundidad
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], env=env, check=True, capture_output=True, text=True,
+    ).stderr
+    packages = defaultdict(int)
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(self_us)
+        total += int(self_us)
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"total_ms": round(total / 1000, 1), "packages_ms": {name: round(us / 1000, 1) for name, us in ranked}}
+
+
+def first_request(env: dict) -> dict:
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST], env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    result = json.loads(output.splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12)
+    parser.add_argument("--budget-ms", type=float, default=2000, help="Máximo para la mediana de process_ms")
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DATABASE_PATH": os.path.join(tmp, "startup.sqlite")}
+            runs.append(first_request(env))
+        with tempfile.TemporaryDirectory() as tmp:
+            breakdown = import_breakdown({**os.environ, "DATABASE_PATH": os.path.join(tmp, "startup.sqlite")}, args.top)
+
+    report = {key: round(statistics.median(run[key] for run in runs), 1) for key in ("process_ms", "import_ms", "lifespan_ms", "first_request_ms")}
+    report["budget_ms"] = args.budget_ms
+    report["within_budget"] = report["process_ms"] <= args.budget_ms
+    report["importtime"] = breakdown
+    print(json.dumps(report, indent=2))
+    if not report["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Benchmark de todas las rutas de la API sobre datasets sintéticos reproducibles (benchmarks.dataset).
+# Cada dataset corre en su propio proceso sobre una copia de la base de datos. Guarda los resultados en
+# JSON y, si hay una línea base, marca como regresión cualquier ruta cuyo throughput baje o cuyo p95 suba
+# más que --threshold (código de salida 1):
+#
+#     python -m benchmarks.suite --datasets 1k 100k --requests 2000 --concurrency 16
+#     python -m benchmarks.suite --datasets 1k --save-baseline
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+
+from benchmarks.asgi import MOVIE, call, lifespan, run_load, run_worker
+from benchmarks.dataset import SIZES, copy_dataset
+from utils.catalog import CATEGORIES, WORDS
+
+BENCHMARKS_DIR = os.path.dirname(os.path.realpath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCHMARKS_DIR, "results", "latest.json")
+
+LOGIN = {"email": "admin@gmail.com", "password": "root"}
+
+
+def routes(app, size: int, seed: int, headers: dict) -> list:
+    # (nombre, petición). Las lecturas usan ids y filtros aleatorios pero reproducibles; delete borra
+    # las películas que creó create, así cada petición afecta a una fila existente.
+    rng = random.Random(seed)
+    created = []
+
+    async def create(i):
+        response = await call(app, "POST", "/movies", body=MOVIE)
+        if response["status"] == 201:
+            created.append(json.loads(response["body"])["movie_id"])
+        return response
+
+    async def delete(i):
+        movie_id = created.pop() if created else rng.randint(1, size)
+        return await call(app, "DELETE", f"/movies/{movie_id}")
+
+    def category_query():
+        year = rng.randint(1990, 2024)
+        return f"category={rng.choice(CATEGORIES)}&year_min={year}&year_max={year}&rating_min={rng.randint(1, 9)}"
+
+    return [
+        ("list", lambda i: call(app, "GET", "/movies", headers=headers, query=f"limit=50&sort={rng.choice(['id', '-year', 'title'])}")),
+        ("get", lambda i: call(app, "GET", f"/movies/{rng.randint(1, min(size, 2000))}")),
+        ("category", lambda i: call(app, "GET", "/movies/", query=category_query())),
+        ("search", lambda i: call(app, "GET", "/movies/search", headers=headers, query=f"q={rng.choice(WORDS)}&limit=20")),
+        ("login", lambda i: call(app, "POST", "/login", body=LOGIN)),
+        ("create", create),
+        ("update", lambda i: call(app, "PUT", f"/movies/{rng.randint(1, size)}", body=MOVIE)),
+        ("patch", lambda i: call(app, "PATCH", f"/movies/{rng.randint(1, size)}", body={"rating": 5.0})),
+        ("delete", delete),
+    ]
+
+
+async def worker(args) -> list:
+    logging.disable(logging.CRITICAL)
+    from main import app
+    from utils.jwt_manager import create_token
+
+    async with lifespan(app):
+        headers = {"authorization": f"Bearer {create_token(LOGIN)}"}
+        results = []
+        for name, request in routes(app, SIZES[args.dataset], args.seed, headers):
+            if args.routes and name not in args.routes:
+                continue
+            for concurrency in args.concurrency:
+                # Calentamiento: cachés, plan de consultas y conexiones del pool
+                await run_load(request, min(100, args.requests), concurrency)
+                # Se queda la repetición mediana (por throughput) para amortiguar el ruido de la máquina
+                runs = [await run_load(request, args.requests, concurrency) for _ in range(args.repeat)]
+                stats = sorted(runs, key=lambda run: run["requests_per_second"])[len(runs) // 2]
+                results.append({"dataset": args.dataset, "route": name, **stats})
+        return results
+
+
+def result_key(row: dict) -> tuple:
+    return row["dataset"], row["route"], row["concurrency"]
+
+
+def compare(results: list, baseline: list, threshold: float) -> list:
+    reference = {result_key(row): row for row in baseline}
+    regressions = []
+    for row in results:
+        base = reference.get(result_key(row))
+        if base is None:
+            continue
+        throughput = row["requests_per_second"] / base["requests_per_second"] - 1
+        p95 = row["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        row["vs_baseline"] = {"requests_per_second": round(throughput, 3), "p95_ms": round(p95, 3)}
+        if throughput < -threshold or p95 > threshold:
+            regressions.append(row)
+    return regressions
+
+
+def run_dataset(dataset: str, seed: int, argv: list) -> list:
+    return run_worker(
+        "benchmarks.suite", ["--dataset", dataset, *argv], prepare=lambda database: copy_dataset(dataset, seed, database)
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--datasets", nargs="+", choices=SIZES, default=["1k"])
+    parser.add_argument("--routes", nargs="+", default=None, help="Solo estas rutas (list, get, category, ...)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[16])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.10, help="Variación tolerada respecto a la línea base (0.10 = 10 %%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda estos resultados como nueva línea base")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--dataset", help=argparse.SUPPRESS)
+    return parser
+
+
+def main():
+    argv = sys.argv[1:]
+    args = build_parser().parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(asyncio.run(worker(args))))
+        return
+
+    results = []
+    for dataset in args.datasets:
+        results.extend(run_dataset(dataset, args.seed, argv))
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)["results"], args.threshold)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "db_mode": os.getenv("DB_MODE", "sync"),
+            "requests": args.requests,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "threshold": args.threshold,
+        },
+        "results": results,
+        "regressions": [result_key(row) for row in regressions],
+    }
+    for path in (args.output, args.baseline) if args.save_baseline else (args.output,):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=2)
+
+    for row in results:
+        delta = row.get("vs_baseline", {})
+        print(
+            f"{row['dataset']:>5} {row['route']:<9} c={row['concurrency']:<4} {row['requests_per_second']:>9.1f} req/s "
+            f"p50={row['p50_ms']:.2f} p95={row['p95_ms']:.2f} p99={row['p99_ms']:.2f} ms"
+            + (f"  Δreq/s={delta['requests_per_second']:+.1%} Δp95={delta['p95_ms']:+.1%}" if delta else "")
+            + ("  REGRESIÓN" if row in regressions else "")
+        )
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Mide escrituras por segundo de POST /movies con y sin commit en grupo (WRITE_BATCH), para cada perfil
+# de SQLite. Cada combinación corre en su propio proceso con una base de datos temporal:
+#
+#     python -m benchmarks.write_batch --requests 2000 --concurrency 1 16 64
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from benchmarks.asgi import MOVIE, call, lifespan, run_load, run_worker
+
+
+async def worker(args) -> list:
+    logging.disable(logging.CRITICAL)
+    from main import app
+    from services.movie import write_batcher
+
+    async with lifespan(app):
+        async def write(i):
+            return await call(app, "POST", "/movies", body=MOVIE)
+
+        results = []
+        for concurrency in args.concurrency:
+            write_batcher.batches = write_batcher.operations = 0
+            stats = await run_load(write, args.requests, concurrency)
+            stats["writes_per_second"] = stats.pop("requests_per_second")
+            results.append({
+                "profile": os.environ["SQLITE_PRAGMA_PROFILE"],
+                "write_batch": os.environ["WRITE_BATCH"] == "1",
+                **stats,
+                **(write_batcher.stats() if os.environ["WRITE_BATCH"] == "1" else {}),
+            })
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--profiles", nargs="+", default=["development", "production"])
+    parser.add_argument("--window-ms", default="2")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(worker(args))))
+        return
+
+    for profile in args.profiles:
+        for enabled in ("0", "1"):
+            env = {"SQLITE_PRAGMA_PROFILE": profile, "WRITE_BATCH": enabled, "WRITE_BATCH_WINDOW_MS": args.window_ms}
+            for row in run_worker("benchmarks.write_batch", sys.argv[1:], env):
+                print(json.dumps(row))
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,42 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm.session import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
+from config import settings
+from utils import sql_stats
 
-sqlite_file_name = "../database.sqlite"
+sqlite_file_name = os.getenv("DATABASE_PATH", "../database.sqlite")
 base_dir = os.path.dirname(os.path.realpath(__file__))
+database_path = os.path.join(base_dir, sqlite_file_name)
 
-database_url = f"sqlite:///{os.path.join(base_dir, sqlite_file_name)}"
+database_url = f"sqlite:///{database_path}"
+async_database_url = f"sqlite+aiosqlite:///{database_path}"
 
-engine = create_engine(database_url, echo=True)
+engine = create_engine(database_url, echo=settings.sql_echo)
 
 Session = sessionmaker(bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in settings.sqlite_pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+sql_stats.install(engine)
+event.listen(engine, "connect", apply_sqlite_pragmas)
+
+# Motor asíncrono (aiosqlite) usado cuando DB_MODE=async. En modo sync no se crea, así no se importan
+# sqlalchemy.ext.asyncio ni aiosqlite al arrancar.
+async_engine = None
+AsyncSession = None
+if settings.db_mode == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(async_database_url, echo=settings.sql_echo)
+    AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+    sql_stats.install(async_engine.sync_engine)
+    event.listen(async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+
+Base = declarative_base()
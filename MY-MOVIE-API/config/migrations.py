@@ -0,0 +1,80 @@
+from sqlalchemy import text
+from config.database import Base
+import models.movie  # registra las tablas en Base.metadata
+import models.idempotency
+import models.revoked_token
+
+# Índice de texto completo sobre title y overview. Es una tabla FTS5 de contenido externo: no duplica
+# el texto, solo el índice, y los triggers la mantienen sincronizada con movies.
+FTS_STATEMENTS = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title, overview, content='movies', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts(rowid, title, overview) VALUES (new.id, new.title, new.overview);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, overview) VALUES ('delete', old.id, old.title, old.overview);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, overview ON movies BEGIN
+        INSERT INTO movies_fts(movies_fts, rowid, title, overview) VALUES ('delete', old.id, old.title, old.overview);
+        INSERT INTO movies_fts(rowid, title, overview) VALUES (new.id, new.title, new.overview);
+    END
+    """,
+)
+
+# Contador de cambios por tabla: lo incrementan los triggers en cada fila insertada, modificada o borrada.
+# Las respuestas de listados usan ese número como ETag sin tener que leer las filas.
+TABLE_VERSION_STATEMENTS = (
+    "CREATE TABLE IF NOT EXISTS table_versions (name VARCHAR PRIMARY KEY, version INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO table_versions (name, version) VALUES ('movies', 0)",
+) + tuple(
+    f"""
+    CREATE TRIGGER IF NOT EXISTS movies_version_{operation.lower()} AFTER {operation} ON movies BEGIN
+        UPDATE table_versions SET version = version + 1 WHERE name = 'movies';
+    END
+    """
+    for operation in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+def rebuild_fts(connection) -> None:
+    connection.execute(text("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')"))
+
+
+def run_migrations(engine) -> None:
+    # Idempotente: create_all solo crea las tablas que faltan y no añade índices nuevos a tablas
+    # ya existentes, así que cada índice del modelo se crea aparte con checkfirst
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        # create_all tampoco añade columnas: las bases de datos anteriores a movies.version o a
+        # idempotency_keys.claim las reciben aquí
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(movies)"))}
+        if "version" not in columns:
+            connection.execute(text("ALTER TABLE movies ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+        columns = {row[1] for row in connection.execute(text("PRAGMA table_info(idempotency_keys)"))}
+        if "claim" not in columns:
+            connection.execute(text("ALTER TABLE idempotency_keys ADD COLUMN claim VARCHAR"))
+
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
+
+        for statement in TABLE_VERSION_STATEMENTS:
+            connection.execute(text(statement))
+
+        fts_exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'")
+        ).first()
+        for statement in FTS_STATEMENTS:
+            connection.execute(text(statement))
+        if not fts_exists:
+            # Bases de datos anteriores al índice: se indexan las películas que ya existen
+            rebuild_fts(connection)
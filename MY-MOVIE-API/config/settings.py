@@ -0,0 +1,124 @@
+import os
+import tempfile
+
+app_env = os.getenv("APP_ENV", "development")
+
+# Migraciones del esquema al arrancar el servidor (lifespan). Con RUN_MIGRATIONS=0 se asume que el
+# despliegue ya las ejecutó (python manage.py migrate) y los workers arrancan sin DDL.
+run_migrations = os.getenv("RUN_MIGRATIONS", "1") == "1"
+
+# "sync": Session de SQLAlchemy ejecutada en el threadpool; "async": AsyncSession sobre aiosqlite
+db_mode = os.getenv("DB_MODE", "sync")
+if db_mode not in ("sync", "async"):
+    raise ValueError(f"DB_MODE debe ser 'sync' o 'async', no {db_mode!r}")
+
+# Perfiles de PRAGMA de SQLite aplicados a cada conexión nueva. "production" usa WAL para que las
+# lecturas no se bloqueen con las escrituras y synchronous=NORMAL para no hacer fsync en cada commit.
+sqlite_pragma_profiles = {
+    "development": {},
+    "production": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "temp_store": "MEMORY",
+        "cache_size": -65536,  # negativo = KiB (64 MiB)
+        "mmap_size": 268435456,  # 256 MiB
+    },
+}
+sqlite_pragma_profile = os.getenv("SQLITE_PRAGMA_PROFILE", "production" if app_env == "production" else "development")
+if sqlite_pragma_profile not in sqlite_pragma_profiles:
+    raise ValueError(f"SQLITE_PRAGMA_PROFILE desconocido: {sqlite_pragma_profile!r}")
+
+# Ajustes puntuales sobre el perfil, p. ej. SQLITE_PRAGMAS="cache_size=-131072,mmap_size=0"
+sqlite_pragmas = dict(sqlite_pragma_profiles[sqlite_pragma_profile])
+for item in filter(None, os.getenv("SQLITE_PRAGMAS", "").split(",")):
+    name, _, value = item.partition("=")
+    sqlite_pragmas[name.strip()] = value.strip()
+
+# Registro de SQL: echo vuelca cada sentencia (solo para depurar); en su lugar se registran como JSON
+# las sentencias que superan el umbral y una muestra aleatoria del resto.
+sql_echo = os.getenv("SQL_ECHO", "0") == "1"
+sql_slow_query_ms = float(os.getenv("SQL_SLOW_QUERY_MS", "100"))
+sql_log_sample_rate = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))
+
+# Paginación por cursor de GET /movies
+default_page_size = int(os.getenv("MOVIES_PAGE_SIZE", "100"))
+max_page_size = int(os.getenv("MOVIES_MAX_PAGE_SIZE", "500"))
+
+# Exportación en streaming del catálogo
+export_batch_size = int(os.getenv("MOVIES_EXPORT_BATCH_SIZE", "1000"))
+
+# Alta masiva de películas (POST /movies/bulk)
+bulk_max_items = int(os.getenv("MOVIES_BULK_MAX_ITEMS", "50000"))
+bulk_chunk_size = int(os.getenv("MOVIES_BULK_CHUNK_SIZE", "1000"))
+# 6 columnas por fila: 5000 filas quedan por debajo del límite de 32766 parámetros de SQLite
+bulk_max_chunk_size = int(os.getenv("MOVIES_BULK_MAX_CHUNK_SIZE", "5000"))
+
+# Lectura de varias películas por id (POST /movies/batch-get). Cada bloque es un SELECT ... WHERE id IN
+# (...) con un parámetro por id: 500 queda por debajo incluso del límite antiguo de 999 de SQLite.
+batch_get_max_ids = int(os.getenv("MOVIES_BATCH_GET_MAX_IDS", "1000"))
+batch_get_chunk_size = int(os.getenv("MOVIES_BATCH_GET_CHUNK_SIZE", "500"))
+
+# Cabecera Idempotency-Key en POST /movies y /movies/bulk. Las respuestas se guardan en la tabla
+# idempotency_keys (compartida por todos los workers) durante IDEMPOTENCY_TTL segundos y como mucho
+# IDEMPOTENCY_MAX_KEYS a la vez. Un reintento con la misma clave mientras la original sigue en curso
+# espera hasta IDEMPOTENCY_WAIT_TIMEOUT segundos. El worker que la atiende renueva su plazo de
+# IDEMPOTENCY_LEASE segundos mientras sigue en curso; si muere, la clave se libera cuando vence.
+idempotency_ttl = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+idempotency_max_keys = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000"))
+idempotency_lease = float(os.getenv("IDEMPOTENCY_LEASE", "30"))
+idempotency_wait_timeout = float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", "10"))
+
+# Caché en memoria de GET /movies/{id} (respuestas ya serializadas). MOVIE_CACHE_SIZE=0 la desactiva.
+# Es por proceso: con varios workers, los demás ven una escritura como mucho MOVIE_CACHE_TTL segundos tarde.
+movie_cache_size = int(os.getenv("MOVIE_CACHE_SIZE", "1024"))
+movie_cache_ttl = float(os.getenv("MOVIE_CACHE_TTL", "60"))
+
+# Caché de tokens JWT ya verificados (clave: SHA-256 del token). TOKEN_CACHE_SIZE=0 la desactiva.
+token_cache_size = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+token_cache_ttl = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+# Validez de los tokens emitidos por /login (claim exp)
+token_ttl = float(os.getenv("TOKEN_TTL", "86400"))
+
+# Compresión gzip de respuestas (middleware y variantes precomprimidas de la caché)
+gzip_minimum_size = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+gzip_level = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Caché de listados ya serializados (y comprimidos), indexada por ETag: incluye la versión de la tabla,
+# así que una escritura deja obsoletas todas las entradas sin invalidarlas una a una
+listing_cache_size = int(os.getenv("LISTING_CACHE_SIZE", "256"))
+listing_cache_ttl = float(os.getenv("LISTING_CACHE_TTL", "60"))
+
+# Commit en grupo de las escrituras individuales (POST, PUT y DELETE de /movies): un hilo escritor junta
+# las que llegan en WRITE_BATCH_WINDOW_MS (o hasta WRITE_BATCH_MAX_OPS) y las confirma en una sola transacción
+write_batch_enabled = os.getenv("WRITE_BATCH", "0") == "1"
+write_batch_window_ms = float(os.getenv("WRITE_BATCH_WINDOW_MS", "2"))
+write_batch_max_ops = int(os.getenv("WRITE_BATCH_MAX_OPS", "64"))
+
+# Métricas Prometheus en GET /metrics. Con varios workers hay que definir además PROMETHEUS_MULTIPROC_DIR
+metrics_enabled = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Perfilado por petición (pilas "collapsed" para flamegraphs): se activa para las peticiones con la cabecera
+# X-Profile igual a PROFILE_TOKEN y para una fracción PROFILE_SAMPLE_RATE del resto
+profile_token = os.getenv("PROFILE_TOKEN", "")
+profile_sample_rate = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+profile_interval_ms = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+profile_dir = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "movie-api-profiles"))
+# Perfiles guardados como mucho: al superar el límite se borran los más antiguos
+profile_max_files = int(os.getenv("PROFILE_MAX_FILES", "200"))
+
+# Control de admisión: como mucho ADMISSION_READ_LIMIT lecturas (GET/HEAD) y ADMISSION_WRITE_LIMIT escrituras
+# a la vez por worker (32 + 8 son los 40 hilos del threadpool de anyio). Las demás esperan en una cola de
+# ADMISSION_QUEUE_SIZE por clase durante ADMISSION_QUEUE_TIMEOUT_MS como mucho; con la cola llena o agotada
+# la espera se responde 503 con Retry-After. Con ADMISSION_ADAPTIVE=1 el límite baja (AIMD) cuando la
+# latencia supera ADMISSION_TARGET_LATENCY_MS y se recupera hasta el configurado cuando vuelve a bajar.
+admission_enabled = os.getenv("ADMISSION_CONTROL", "0") == "1"
+admission_read_limit = int(os.getenv("ADMISSION_READ_LIMIT", "32"))
+admission_write_limit = int(os.getenv("ADMISSION_WRITE_LIMIT", "8"))
+admission_queue_size = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+admission_queue_timeout_ms = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "500"))
+admission_retry_after = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+admission_adaptive = os.getenv("ADMISSION_ADAPTIVE", "0") == "1"
+admission_target_latency_ms = float(os.getenv("ADMISSION_TARGET_LATENCY_MS", "100"))
+# Rutas que nunca se limitan (la monitorización debe responder también bajo carga)
+admission_exempt_paths = frozenset(os.getenv("ADMISSION_EXEMPT_PATHS", "/metrics").split(","))
@@ -0,0 +1,11 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+# Las pruebas usan una base de datos temporal: config.database lee DATABASE_PATH al importarse, así que
+# se define antes de que ninguna prueba importe la aplicación
+_database_dir = tempfile.mkdtemp(prefix="movie-api-tests-")
+os.environ["DATABASE_PATH"] = os.path.join(_database_dir, "database.sqlite")
+os.environ.setdefault("RUN_MIGRATIONS", "1")
+atexit.register(shutil.rmtree, _database_dir, ignore_errors=True)
@@ -1,39 +1,57 @@
-from fastapi import FastAPI, Depends, Body, Path, Query, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional, List
-from utils.jwt_manager import create_token, validate_token
-from fastapi.security import HTTPBearer
-from config.database import Session, engine, Base
-from models.movie import Movie as MovieModel
-from fastapi.encoders import jsonable_encoder
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from config.database import async_engine, engine
 from middlewares.error_handler import ErrorHandler
+from middlewares.compression import GZipMiddleware
 from routers.movie import movie_router
 from routers.user import user_router
+from routers.admin import admin_router
+from services.movie import write_batcher
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importar la aplicación no toca la base de datos: el esquema se prepara al arrancar el servidor
+    # (una vez por worker) y se puede desactivar con RUN_MIGRATIONS=0 si ya lo hizo el despliegue
+    if settings.run_migrations:
+        from config.migrations import run_migrations
+        await run_in_threadpool(run_migrations, engine)
+    yield
+    await run_in_threadpool(write_batcher.close)
+    engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 app.title = "My first app with FastAPI"
 app.version = '0.01'
 
+# El último middleware añadido es el más externo: ErrorHandler envuelve también a GZip
+app.add_middleware(GZipMiddleware)
 app.add_middleware(ErrorHandler)
+if settings.admission_enabled:
+    # Por fuera de ErrorHandler y GZip: una petición rechazada no pasa por ellos; las métricas sí la cuentan
+    from middlewares.admission import AdmissionMiddleware
+    app.add_middleware(AdmissionMiddleware)
+if settings.metrics_enabled:
+    # Por fuera de todos salvo Profiling: mide también la compresión, las respuestas 500 de ErrorHandler
+    # y los 503 del control de admisión
+    from middlewares.metrics import MetricsMiddleware
+    from routers.metrics import metrics_router
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+if settings.profile_token or settings.profile_sample_rate:
+    from middlewares.profiling import ProfilingMiddleware
+    app.add_middleware(ProfilingMiddleware)
 app.include_router(movie_router)
 app.include_router(user_router)
-
-Base.metadata.create_all(bind=engine)
-
-class JWTBearer(HTTPBearer):
-    async def __call__(self, request: Request):
-        auth = await super().__call__(request)
-        data = validate_token(auth.credentials)
-        if data['email'] != "admin@gmail.com":
-            raise HTTPException(status_code=403, detail="Credenciales son invalidas")
-
-class User(BaseModel):
-    email: str
-    password: str
+app.include_router(admin_router)
 
 
 @app.get('/', tags=['home'])
 def message():
     return HTMLResponse('<h1>Hello world</h1>')
-
@@ -0,0 +1,50 @@
+import argparse
+import time
+from config.database import database_path, engine
+from config.migrations import rebuild_fts, run_migrations
+from utils.catalog import generate_movies, load_catalog
+
+
+def rebuild_fts_command(args) -> None:
+    run_migrations(engine)
+    with engine.begin() as connection:
+        rebuild_fts(connection)
+    print("Índice de búsqueda reconstruido")
+
+
+def migrate_command(args) -> None:
+    run_migrations(engine)
+    print("Esquema actualizado")
+
+
+def load_catalog_command(args) -> None:
+    run_migrations(engine)
+    engine.dispose()  # La carga usa su propia conexión en modo exclusivo
+    started = time.perf_counter()
+    count = load_catalog(database_path, generate_movies(args.count, args.seed), replace=args.replace)
+    elapsed = time.perf_counter() - started
+    print(f"{count} películas cargadas en {elapsed:.1f} s ({count / elapsed:.0f} filas/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Tareas de mantenimiento de MY-MOVIE-API")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Crea o actualiza el esquema (tablas, índices, FTS y triggers)")
+    migrate.set_defaults(handler=migrate_command)
+
+    rebuild = commands.add_parser("rebuild-fts", help="Reconstruye el índice de texto completo movies_fts")
+    rebuild.set_defaults(handler=rebuild_fts_command)
+
+    load = commands.add_parser("load-catalog", help="Genera un catálogo sintético y lo carga directamente en SQLite")
+    load.add_argument("--count", type=int, default=100000)
+    load.add_argument("--seed", type=int, default=42)
+    load.add_argument("--replace", action="store_true", help="Borra antes las películas existentes")
+    load.set_defaults(handler=load_catalog_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import time
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import settings
+from utils.admission import AdmissionLimiter
+
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+# Rutas POST que solo leen
+READ_PATHS = frozenset(("/movies/batch-get",))
+
+class AdmissionMiddleware:
+    # Control de admisión y descarte de carga: limita las peticiones en curso por clase (lecturas y
+    # escrituras) antes de que lleguen al threadpool. Si no hay hueco esperan en una cola acotada; con la cola
+    # llena o la espera agotada se responde 503 enseguida, en vez de hacer un trabajo que el cliente ya no
+    # esperará. Las escrituras tienen su propio límite para que una ráfaga de lecturas no las deje sin hueco.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        target = settings.admission_target_latency_ms / 1000 if settings.admission_adaptive else None
+        timeout = settings.admission_queue_timeout_ms / 1000
+        self.limiters = {
+            "read": AdmissionLimiter(settings.admission_read_limit, settings.admission_queue_size, timeout, target),
+            "write": AdmissionLimiter(settings.admission_write_limit, settings.admission_queue_size, timeout, target),
+        }
+        if settings.metrics_enabled:
+            from utils import metrics
+            for name, limiter in self.limiters.items():
+                metrics.register_limiter(name, limiter)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in settings.admission_exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        is_read = scope["method"] in READ_METHODS or scope["path"] in READ_PATHS
+        limiter = self.limiters["read" if is_read else "write"]
+        if await limiter.acquire() is not None:
+            # MetricsMiddleware cuenta estos 503 con la ruta "rejected": aún no se ha enrutado la petición
+            scope["admission_rejected"] = True
+            response = JSONResponse(
+                status_code=503,
+                content={"message": "El servidor está saturado, inténtalo de nuevo más tarde"},
+                headers={"Retry-After": str(settings.admission_retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        latency = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal latency
+            if message["type"] == "http.response.start":
+                latency = time.perf_counter() - started
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            limiter.release(latency)
@@ -1,13 +1,30 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import FastAPI,Request,Response
 from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class ErrorHandler:
+    # Middleware ASGI puro: no envuelve la petición en tareas ni streams como BaseHTTPMiddleware,
+    # así que las respuestas en streaming y las tareas en segundo plano pasan sin tocar
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-class ErrorHandler(BaseHTTPMiddleware):
-    def __init__(self, app: FastAPI) -> None:
-        super().__init__(app)
-    
-    async def dispatch(self, request:Request, call_next)-> Response| JSONResponse:
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
-            return JSONResponse(status_code=500, content={'error':str(e)})
\ No newline at end of file
+            # Si la respuesta ya empezó no se puede enviar otra: el servidor cierra la conexión
+            if response_started:
+                raise
+            response = JSONResponse(status_code=500, content={'error': str(e)})
+            await response(scope, receive, send)
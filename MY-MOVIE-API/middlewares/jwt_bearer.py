@@ -0,0 +1,18 @@
+from fastapi import Request, HTTPException
+from fastapi.security import HTTPBearer
+from jwt.exceptions import InvalidTokenError
+from starlette.concurrency import run_in_threadpool
+from utils.jwt_manager import cached_claims, verify_token
+
+class JWTBearer(HTTPBearer):
+    async def __call__(self, request: Request):
+        auth = await super().__call__(request)
+        try:
+            # Con el token en caché no hay E/S; si no, la consulta de revocación va al threadpool
+            data = cached_claims(auth.credentials)
+            if data is None:
+                data = await run_in_threadpool(verify_token, auth.credentials)
+        except InvalidTokenError:
+            raise HTTPException(status_code=403, detail="Credenciales son invalidas")
+        if data.get('email') != "admin@gmail.com":
+            raise HTTPException(status_code=403, detail="Credenciales son invalidas")
@@ -0,0 +1,37 @@
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils import metrics
+
+class MetricsMiddleware:
+    # Middleware ASGI puro que mide cada petición hasta el último byte del cuerpo. La ruta se etiqueta con
+    # su plantilla (/movies/{id}), que FastAPI deja en scope["route"] al enrutar; las peticiones que no
+    # encajan en ninguna ruta comparten la etiqueta "unmatched" para no disparar la cardinalidad y las que
+    # descarta el control de admisión, la etiqueta "rejected".
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics.maybe_refresh_gauges()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        metrics.http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.http_requests_in_progress.dec()
+            if scope.get("admission_rejected"):
+                route = "rejected"
+            else:
+                route = getattr(scope.get("route"), "path_format", "unmatched")
+            metrics.observe_request(scope["method"], route, status, time.perf_counter() - started)
@@ -0,0 +1,48 @@
+import hmac
+import random
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from config import settings
+from utils import profiler
+
+class ProfilingMiddleware:
+    # Perfila las peticiones que envían X-Profile con PROFILE_TOKEN y una muestra aleatoria
+    # (PROFILE_SAMPLE_RATE) del resto. main.py solo lo añade si alguno de los dos está configurado, así que
+    # desactivado no cuesta nada; activado, una petición no seleccionada paga solo la comprobación.
+    # El perfil se guarda en PROFILE_DIR y su id llega en la cabecera X-Profile-Id.
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.token = settings.profile_token.encode()
+        self.sample_rate = settings.profile_sample_rate
+        self.interval = settings.profile_interval_ms / 1000
+
+    def selected(self, scope: Scope) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, self.token)
+        return False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.selected(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.RequestProfile(self.interval)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = profiler.current_profile.set(profile)
+        profile.start()
+        try:
+            await profiler.profiled_call(profile, self.app, scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            profiler.current_profile.reset(token)
+            # Escribir el perfil y podar los antiguos toca disco: se hace fuera del bucle de eventos
+            await run_in_threadpool(profiler.save, profile, settings.profile_dir, settings.profile_max_files)
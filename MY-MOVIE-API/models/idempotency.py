@@ -0,0 +1,21 @@
+from config.database import Base
+from sqlalchemy import Column,Float,Index,Integer,LargeBinary,String
+
+class IdempotencyKey(Base):
+    # Respuestas guardadas por Idempotency-Key (services.idempotency). status es NULL mientras la petición
+    # original está en curso; expires_at es entonces el fin de su plazo y, al terminar, el de la caducidad.
+    # claim identifica la reserva vigente: solo esa puede renovar el plazo, guardar la respuesta o liberarla.
+
+    __tablename__="idempotency_keys"
+    __table_args__=(
+        Index("ix_idempotency_keys_expires_at","expires_at"),
+    )
+
+    scope=Column(String,primary_key=True)
+    key=Column(String,primary_key=True)
+    fingerprint=Column(String,nullable=False)
+    claim=Column(String)
+    status=Column(Integer)
+    media_type=Column(String)
+    body=Column(LargeBinary)
+    expires_at=Column(Float,nullable=False)
@@ -1,13 +1,23 @@
 from config.database import Base
-from sqlalchemy import Column,Integer,String,Float
+from sqlalchemy import Column,Integer,String,Float,Index
 
 class Movie(Base):
 
     __tablename__="movies"
+    __table_args__=(
+        # Índices para la paginación por cursor ordenada por año o título
+        Index("ix_movies_year_id","year","id"),
+        Index("ix_movies_title_id","title","id"),
+        # Índices para filtrar por categoría y rango de año o de calificación
+        Index("ix_movies_category_year","category","year"),
+        Index("ix_movies_category_rating","category","rating"),
+    )
 
     id= Column(Integer,primary_key=True,index=True,autoincrement=True)
     title=Column(String)
     overview=Column(String)
     year=Column(Integer)
     rating=Column(Float)
-    category=Column(String)
\ No newline at end of file
+    category=Column(String)
+    # Se incrementa en cada UPDATE y se expone como ETag para el control de concurrencia optimista
+    version=Column(Integer,nullable=False,default=1,server_default="1")
@@ -0,0 +1,14 @@
+from config.database import Base
+from sqlalchemy import Column,Float,Index,String
+
+class RevokedToken(Base):
+    # Tokens revocados con POST /logout (SHA-256 del token en hexadecimal). La fila se puede borrar cuando
+    # el token caduca (expires_at, su claim exp): a partir de ahí decode() ya lo rechaza por sí solo.
+
+    __tablename__="revoked_tokens"
+    __table_args__=(
+        Index("ix_revoked_tokens_expires_at","expires_at"),
+    )
+
+    digest=Column(String,primary_key=True)
+    expires_at=Column(Float)
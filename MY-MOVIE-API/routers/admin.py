@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from config import settings
+from middlewares.jwt_bearer import JWTBearer
+from routers.movie import listing_cache, movie_cache
+from utils.jwt_manager import token_cache
+from utils import sql_stats
+
+admin_router = APIRouter()
+
+
+@admin_router.get('/admin/sql-stats', tags=['admin'], dependencies=[Depends(JWTBearer())])
+def get_sql_stats(reset: bool = Query(default=False)):
+    result = sql_stats.snapshot()
+    if reset:
+        sql_stats.reset()
+    return JSONResponse(status_code=200, content=result)
+
+
+@admin_router.get('/admin/cache-stats', tags=['admin'], dependencies=[Depends(JWTBearer())])
+def get_cache_stats():
+    return JSONResponse(status_code=200, content={"movies": movie_cache.stats(), "listings": listing_cache.stats(), "tokens": token_cache.stats()})
+
+
+@admin_router.get('/admin/profiles', tags=['admin'], dependencies=[Depends(JWTBearer())])
+def get_profiles():
+    from utils import profiler
+    return JSONResponse(status_code=200, content=profiler.list_profiles(settings.profile_dir))
+
+
+@admin_router.get('/admin/profiles/{profile_id}', tags=['admin'], dependencies=[Depends(JWTBearer())])
+def get_profile(profile_id: str):
+    # Pilas en formato collapsed: flamegraph.pl perfil.collapsed > perfil.svg (o arrastrarlo a speedscope)
+    from utils import profiler
+    result = profiler.read_profile(settings.profile_dir, profile_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return PlainTextResponse(status_code=200, content=result)
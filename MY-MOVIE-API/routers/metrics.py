@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+from routers.movie import listing_cache, movie_cache
+from utils import metrics
+from utils.jwt_manager import token_cache
+
+metrics_router = APIRouter()
+
+metrics.register_cache("movies", movie_cache)
+metrics.register_cache("listings", listing_cache)
+metrics.register_cache("tokens", token_cache)
+
+
+@metrics_router.get('/metrics', tags=['admin'], include_in_schema=False)
+async def get_metrics():
+    # async: el estado del threadpool de anyio solo se puede leer desde el bucle de eventos
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
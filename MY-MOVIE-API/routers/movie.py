@@ -1,84 +1,299 @@
-from fastapi import APIRouter, Depends, Body, Path, Query, Request, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional, List
-from utils.jwt_manager import create_token, validate_token
-from fastapi.security import HTTPBearer
-from config.database import Session, engine, Base
-from models.movie import Movie as MovieModel
+import hashlib
+import json
+from fastapi import APIRouter, Depends, Body, Header, Path, Query, Request, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import Field, ValidationError
+from typing import Annotated, Optional, List, Literal
 from fastapi.encoders import jsonable_encoder
-from middlewares.error_handler import ErrorHandler
-from services.movie import MovieService
-from schema.movie import Movie
+from middlewares.jwt_bearer import JWTBearer
+from services.movie import SORT_COLUMNS, build_match_query, movie_service
+from services.idempotency import idempotency_store
+from schema.movie import Movie, MovieUpdate
+from config import settings
+from utils.pagination import INT64_MAX, encode_cursor, decode_cursor
+from utils.cache import LRUCache
+from utils.etag import if_match_versions, if_none_match, listing_etag, not_modified, version_etag
+from utils.responses import CachedBody, movie_adapter, movie_list_adapter, search_list_adapter
 
 movie_router = APIRouter()
-Base.metadata.create_all(bind=engine)
+movie_cache = LRUCache(settings.movie_cache_size, settings.movie_cache_ttl)
+# La clave es el ETag del listado, que ya incluye la versión de la tabla: no hace falta invalidarla
+listing_cache = LRUCache(settings.listing_cache_size, settings.listing_cache_ttl)
 
-class JWTBearer(HTTPBearer):
-    async def __call__(self, request: Request):
-        auth = await super().__call__(request)
-        data = validate_token(auth.credentials)
-        if data['email'] != "admin@gmail.com":
-            raise HTTPException(status_code=403, detail="Credenciales son invalidas")
+SORT_PATTERN = "^-?(" + "|".join(SORT_COLUMNS) + ")$"
 
 @movie_router.get('/movies', tags=['movies'], response_model=List[Movie], status_code=200, dependencies=[Depends(JWTBearer())])
-def get_movies() -> List[Movie]:
-    db = Session()
+async def get_movies(
+    request: Request,
+    limit: int = Query(default=settings.default_page_size, ge=1, le=settings.max_page_size),
+    after: Optional[str] = Query(default=None, max_length=512),
+    sort: str = Query(default="id", pattern=SORT_PATTERN),
+) -> List[Movie]:
     try:
-        result = MovieService(db).get_movies()
-        return JSONResponse(status_code=200, content=jsonable_encoder(result))
-    finally:
-        db.close()
+        key = decode_cursor(after, sort) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@movie_router.get('/movies/{id}', tags=['movies'], response_model=Movie)
-def get_movie(id: int = Path(ge=1, le=2000)) -> Movie:
-    db = Session()
+    async with movie_service() as service:
+        # El contador de cambios de la tabla basta para responder 304 sin leer ni serializar filas
+        etag = listing_etag("movies", await service.get_table_version(), request)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        cached = listing_cache.get(etag)
+        if cached is None:
+            result, next_key = await service.get_movies(limit, key, sort)
+            cached = CachedBody(movie_list_adapter.dump_json(result), etag, next_headers(request, sort, next_key))
+            listing_cache.set(etag, cached)
+    return cached.response(request)
+
+def next_headers(request: Request, sort: str, next_key: tuple) -> dict:
+    if next_key is None:
+        return {}
+    cursor = encode_cursor(sort, *next_key)
+    return {"X-Next-Cursor": cursor, "Link": f'<{request.url.include_query_params(after=cursor)}>; rel="next"'}
+
+async def export_movies_chunks(format: str, batch_size: int):
+    if format == "json":
+        yield b"["
+    first = True
+    after = None
+    while True:
+        # Cada lote es una consulta keyset corta (id > último id) con su propia sesión: mientras el cliente
+        # lee la respuesta no queda ninguna conexión ni transacción abierta
+        async with movie_service() as service:
+            partition, after = await service.get_movies(batch_size, after, "id")
+        if partition:
+            if format == "ndjson":
+                yield b"\n".join(movie_adapter.dump_json(row) for row in partition) + b"\n"
+            else:
+                # Se quitan los corchetes del array del lote para encadenarlo con los anteriores
+                yield (b"" if first else b",") + movie_list_adapter.dump_json(partition)[1:-1]
+            first = False
+        if after is None:
+            break
+    if format == "json":
+        yield b"]"
+
+@movie_router.get('/movies/export', tags=['movies'], status_code=200, dependencies=[Depends(JWTBearer())])
+async def export_movies(format: Literal["ndjson", "json"] = Query(default="ndjson")):
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(export_movies_chunks(format, settings.export_batch_size), media_type=media_type)
+
+@movie_router.get('/movies/search', tags=['movies'], status_code=200, dependencies=[Depends(JWTBearer())])
+async def search_movies(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=settings.default_page_size, ge=1, le=settings.max_page_size),
+    after: Optional[str] = Query(default=None, max_length=512),
+):
+    match = build_match_query(q)
+    if not match:
+        raise HTTPException(status_code=400, detail="La búsqueda no contiene palabras")
     try:
-        result = MovieService(db).get_movie(id)
+        key = decode_cursor(after, "search") if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async with movie_service() as service:
+        etag = listing_etag("movies", await service.get_table_version(), request)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        cached = listing_cache.get(etag)
+        if cached is None:
+            result, next_key = await service.search_movies(match, limit, key)
+            body = search_list_adapter.dump_json(result)
+            cached = CachedBody(body, etag, next_headers(request, "search", next_key))
+            listing_cache.set(etag, cached)
+    return cached.response(request)
+
+@movie_router.get('/movies/{id}', tags=['movies'], response_model=Movie)
+async def get_movie(request: Request, id: int = Path(ge=1, le=2000)) -> Movie:
+    cached = movie_cache.get(id)
+    if cached is None:
+        generation = movie_cache.generation
+        async with movie_service() as service:
+            result = await service.get_movie_row(id)
         if not result:
             raise HTTPException(status_code=404, detail="Lo siento, no lo encontré 😓")
-        return JSONResponse(status_code=200, content=jsonable_encoder(result))
-    finally:
-        db.close()
+        etag = version_etag(result.pop("version"))
+        cached = CachedBody(movie_adapter.dump_json(result), etag)
+        movie_cache.set(id, cached, generation)
+    if if_none_match(request, cached.etag):
+        return not_modified(cached.etag)
+    return cached.response(request)
+
+@movie_router.post('/movies/batch-get', tags=['movies'], response_model=dict, status_code=200, dependencies=[Depends(JWTBearer())])
+async def batch_get_movies(
+    ids: List[Annotated[int, Field(ge=1, le=INT64_MAX)]] = Body(embed=True, min_length=1, max_length=settings.batch_get_max_ids),
+) -> dict:
+    # Las películas se devuelven en el orden pedido y sin repetidos. Las que están en movie_cache no se
+    # consultan; el resto se lee con una consulta IN por bloque y se guarda en la caché como en GET /movies/{id}.
+    ids = list(dict.fromkeys(ids))
+    bodies = {}
+    pending = []
+    for movie_id in ids:
+        cached = movie_cache.get(movie_id)
+        if cached is None:
+            pending.append(movie_id)
+        else:
+            bodies[movie_id] = cached.body
+    if pending:
+        generation = movie_cache.generation
+        async with movie_service() as service:
+            rows = await service.get_movie_rows(pending, settings.batch_get_chunk_size)
+        for row in rows:
+            etag = version_etag(row.pop("version"))
+            cached = CachedBody(movie_adapter.dump_json(row), etag)
+            movie_cache.set(row["id"], cached, generation)
+            bodies[row["id"]] = cached.body
+
+    # Los ids inexistentes se informan sin fallar la petición. Los cuerpos de la caché ya son JSON y se
+    # concatenan sin volver a serializarlos.
+    missing = [movie_id for movie_id in ids if movie_id not in bodies]
+    movies = b",".join(bodies[movie_id] for movie_id in ids if movie_id in bodies)
+    body = b'{"movies":[' + movies + b'],"missing":' + json.dumps(missing).encode() + b"}"
+    return Response(content=body, media_type="application/json")
 
 @movie_router.get('/movies/', tags=['movies'], response_model=List[Movie])
-def get_movies_by_category_and_year(category: str = Query(min_length=3, max_length=20)):
-    db = Session()
-    try:
-        result = MovieService(db).get_movie_category(category)
-        if not result:
-            raise HTTPException(status_code=404, detail="Lo siento, no lo encontré 😓")
-        return JSONResponse(status_code=200, content=jsonable_encoder(result))
-    finally:
-        db.close()
+async def get_movies_by_category_and_year(
+    request: Request,
+    category: str = Query(min_length=3, max_length=20),
+    year_min: Optional[int] = Query(default=None),
+    year_max: Optional[int] = Query(default=None),
+    rating_min: Optional[float] = Query(default=None, ge=1, le=10),
+    rating_max: Optional[float] = Query(default=None, ge=1, le=10),
+):
+    async with movie_service() as service:
+        etag = listing_etag("movies", await service.get_table_version(), request)
+        if if_none_match(request, etag):
+            return not_modified(etag)
+        cached = listing_cache.get(etag)
+        if cached is None:
+            result = await service.get_movie_category(
+                category, year_min=year_min, year_max=year_max, rating_min=rating_min, rating_max=rating_max
+            )
+            if not result:
+                raise HTTPException(status_code=404, detail="Lo siento, no lo encontré 😓")
+            cached = CachedBody(movie_list_adapter.dump_json(result), etag)
+            listing_cache.set(etag, cached)
+    return cached.response(request)
+
+async def idempotent(request: Request, idempotency_key: Optional[str], handler):
+    # Con Idempotency-Key, la primera petición se ejecuta y su respuesta se guarda; las repeticiones con la
+    # misma clave (misma ruta, query y cuerpo) la reciben de nuevo y las que llegan mientras sigue en curso
+    # esperan a que termine. Sin la cabecera la petición se atiende como siempre.
+    if idempotency_key is None:
+        return await handler()
+    scope = f"{request.method} {request.url.path}"
+    fingerprint = hashlib.sha256(request.url.query.encode() + b"\n" + await request.body()).hexdigest()
+    stored = await idempotency_store.begin(scope, idempotency_key, fingerprint)
+    if stored is None:
+        response = None
+        try:
+            response = await handler()
+        finally:
+            await idempotency_store.finish(scope, idempotency_key, response)
+        return response
+    if stored["fingerprint"] != fingerprint:
+        return JSONResponse(status_code=422, content={"message": "La Idempotency-Key ya se usó con otra petición"})
+    if stored["status"] is None:
+        return JSONResponse(
+            status_code=409,
+            content={"message": "La petición original con esta Idempotency-Key sigue en curso"},
+            headers={"Retry-After": "1"},
+        )
+    return Response(
+        content=stored["body"], status_code=stored["status"], media_type=stored["media_type"], headers={"Idempotent-Replayed": "true"}
+    )
 
 @movie_router.post('/movies', tags=['movies'], response_model=dict, status_code=201)
-def create_movie(movie: Movie) -> dict:
-    db = Session()
-    try:
-        new_movie = MovieService(db).create_movie(movie)
+async def create_movie(
+    request: Request,
+    movie: Movie,
+    idempotency_key: Optional[str] = Header(default=None, min_length=1, max_length=255),
+) -> dict:
+    return await idempotent(request, idempotency_key, lambda: insert_movie(movie))
+
+async def insert_movie(movie: Movie) -> JSONResponse:
+    async with movie_service() as service:
+        new_movie = await service.create_movie(movie)
+        movie_cache.invalidate(new_movie.id)
         return JSONResponse(content={"message": "Se ha registrado la película🍿🎥", "movie_id": new_movie.id}, status_code=201)
-    finally:
-        db.close()
+
+@movie_router.post('/movies/bulk', tags=['movies'], response_model=dict, status_code=201)
+async def create_movies(
+    request: Request,
+    movies: List[dict] = Body(max_length=settings.bulk_max_items),
+    chunk_size: int = Query(default=settings.bulk_chunk_size, ge=1, le=settings.bulk_max_chunk_size),
+    idempotency_key: Optional[str] = Header(default=None, min_length=1, max_length=255),
+) -> dict:
+    return await idempotent(request, idempotency_key, lambda: insert_movies(movies, chunk_size))
+
+async def insert_movies(movies: List[dict], chunk_size: int) -> JSONResponse:
+    valid, errors = [], []
+    for index, item in enumerate(movies):
+        try:
+            valid.append((index, Movie.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors(include_url=False, include_context=False)})
+
+    if not valid:
+        return JSONResponse(status_code=422, content=jsonable_encoder({"message": "Ninguna película es válida", "errors": errors}))
+
+    async with movie_service() as service:
+        ids = await service.create_movies([movie for _, movie in valid], chunk_size)
+
+    movie_ids = [None] * len(movies)
+    for (index, _), movie_id in zip(valid, ids):
+        movie_ids[index] = movie_id
+    return JSONResponse(
+        status_code=201,
+        content=jsonable_encoder({"message": f"Se han registrado {len(ids)} películas🍿🎥", "movie_ids": movie_ids, "errors": errors}),
+    )
+
+def not_found_or_precondition_failed(if_match) -> JSONResponse:
+    # Con If-Match, ninguna fila afectada significa versión obsoleta o película inexistente: en ambos casos
+    # la precondición es falsa (412) y no hace falta otra consulta para distinguirlos
+    if if_match is not None:
+        return JSONResponse(status_code=412, content={"message": "La película no existe o fue modificada por otra petición"})
+    return JSONResponse(status_code=404, content={"message": "Película no encontrada"})
+
+def updated_response(updated_movie: dict) -> JSONResponse:
+    return JSONResponse(
+        status_code=200,
+        content={"message": "Se ha modificado la película", "movie_id": updated_movie["id"]},
+        headers={"ETag": version_etag(updated_movie["version"])},
+    )
 
 @movie_router.put('/movies/{id}', tags=['movies'], response_model=dict, status_code=200)
-def update_movie(id: int, movie: Movie) -> dict:
-    db = Session()
-    try:
-        updated_movie = MovieService(db).update_movie(id, movie)
+async def update_movie(request: Request, id: int, movie: Movie) -> dict:
+    if_match = if_match_versions(request)
+    async with movie_service() as service:
+        updated_movie = await service.update_movie(id, movie.model_dump(exclude={"id"}), if_match)
+        movie_cache.invalidate(id)
         if not updated_movie:
-            return JSONResponse(status_code=404, content={"message": "Película no encontrada"})
-        return JSONResponse(status_code=200, content={"message": "Se ha modificado la película", "movie_id": updated_movie.id})
-    finally:
-        db.close()
+            return not_found_or_precondition_failed(if_match)
+        return updated_response(updated_movie)
+
+@movie_router.patch('/movies/{id}', tags=['movies'], response_model=dict, status_code=200)
+async def patch_movie(request: Request, id: int, movie: MovieUpdate) -> dict:
+    values = movie.model_dump(exclude_unset=True)
+    if not values:
+        raise HTTPException(status_code=400, detail="No se indicó ningún campo para modificar")
+    if_match = if_match_versions(request)
+    async with movie_service() as service:
+        updated_movie = await service.update_movie(id, values, if_match)
+        movie_cache.invalidate(id)
+        if not updated_movie:
+            return not_found_or_precondition_failed(if_match)
+        return updated_response(updated_movie)
 
 @movie_router.delete('/movies/{id}', tags=['movies'], response_model=dict, status_code=200)
-def delete_movie(id: int) -> dict:
-    db = Session()
-    try:
-        deleted_movie = MovieService(db).delete_movie(id)
+async def delete_movie(request: Request, id: int) -> dict:
+    if_match = if_match_versions(request)
+    async with movie_service() as service:
+        deleted_movie = await service.delete_movie(id, if_match)
+        movie_cache.invalidate(id)
         if not deleted_movie:
-            return JSONResponse(status_code=404, content={"message": "Película no encontrada"})
+            return not_found_or_precondition_failed(if_match)
         return JSONResponse(status_code=200, content={"message": "Se ha eliminado la película"})
-    finally:
-        db.close()
@@ -1,5 +1,7 @@
-from fastapi import APIRouter
-from utils.jwt_manager import create_token
+from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from utils.jwt_manager import create_token, revoke_token
+from middlewares.jwt_bearer import JWTBearer
 from fastapi.responses import  JSONResponse
 from schema.user import User
 user_router=APIRouter()
@@ -10,4 +12,10 @@ user_router=APIRouter()
 def login(user: User):
     if user.email == "admin@gmail.com" and user.password == "root":
         token: str = create_token(user.dict())
-        return JSONResponse(status_code=200, content={"token": token})
\ No newline at end of file
+        return JSONResponse(status_code=200, content={"token": token})
+
+
+@user_router.post('/logout', tags=['auth'], dependencies=[Depends(JWTBearer())])
+def logout(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())):
+    revoke_token(credentials.credentials)
+    return JSONResponse(status_code=200, content={"message": "Sesión cerrada"})
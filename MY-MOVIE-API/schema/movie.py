@@ -1,5 +1,6 @@
-from pydantic import BaseModel,Field
+from pydantic import BaseModel,Field,field_validator
 from typing import Optional,List
+from typing_extensions import TypedDict
 
 class Movie(BaseModel):
     id: Optional[int]=None
@@ -20,3 +21,38 @@ class Movie(BaseModel):
                 "category": "Accion",
             }
         }
+
+
+class MovieUpdate(BaseModel):
+    # Modificación parcial (PATCH): solo se validan y se escriben los campos enviados
+    title: Optional[str] = Field(default=None, min_length=1, max_length=50)
+    overview: Optional[str] = Field(default=None, min_length=15, max_length=200)
+    year: Optional[int] = Field(default=None, le=2024)
+    rating: Optional[float] = Field(default=None, ge=1, le=10)
+    category: Optional[str] = Field(default=None, min_length=3, max_length=20)
+
+    @field_validator("title", "overview", "year", "category")
+    @classmethod
+    def not_null(cls, value):
+        # Solo rating admite null, igual que en Movie
+        if value is None:
+            raise ValueError("no puede ser null")
+        return value
+
+
+class MovieRow(TypedDict):
+    # Fila tal como sale de la tabla movies (mismas claves y orden que Movie). Se usa para serializar
+    # respuestas sin validar ni construir modelos; las columnas admiten NULL en la base de datos.
+    id: int
+    title: Optional[str]
+    overview: Optional[str]
+    year: Optional[int]
+    rating: Optional[float]
+    category: Optional[str]
+
+
+class SearchRow(MovieRow):
+    # Resultado de /movies/search: la fila más el título resaltado, el fragmento y la puntuación bm25
+    title_highlight: Optional[str]
+    snippet: Optional[str]
+    rank: float
@@ -0,0 +1,175 @@
+import asyncio
+import time
+import uuid
+from typing import Optional
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from config.database import engine
+from models.idempotency import IdempotencyKey
+
+# Deduplicación de reintentos por Idempotency-Key. La primera petición con una clave la reserva en la tabla
+# idempotency_keys (un INSERT que solo gana un worker) y al terminar guarda su respuesta; las repeticiones
+# reciben esa respuesta sin volver a ejecutarse. La tabla usa siempre el motor síncrono: son sentencias
+# cortas sobre la clave primaria y se ejecutan en el threadpool también con DB_MODE=async.
+# La reserva y la escritura de la película van en transacciones distintas: si el worker muere entre
+# ambas, la clave se libera al vencer el plazo y un reintento vuelve a ejecutarse. Mientras la petición
+# sigue en curso su worker renueva el plazo, así que una petición lenta pero viva no lo pierde. Cada
+# reserva lleva su propio token (claim): si otro worker la retoma tras vencer el plazo, la original ya no
+# puede guardar ni borrar la fila.
+
+POLL_INTERVAL = 0.05  # Espera entre consultas cuando la petición original está en otro worker
+PRUNE_EVERY = 100  # Respuestas guardadas entre dos limpiezas de claves caducadas o sobrantes
+
+_STORED_COLUMNS = (IdempotencyKey.fingerprint, IdempotencyKey.status, IdempotencyKey.media_type, IdempotencyKey.body)
+
+_TRIM_SQL = text(
+    "DELETE FROM idempotency_keys WHERE rowid IN ("
+    "SELECT rowid FROM idempotency_keys WHERE status IS NOT NULL ORDER BY expires_at LIMIT :excess)"
+)
+
+
+def _where_key(statement, scope: str, key: str):
+    return statement.where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+
+
+def _where_claim(statement, scope: str, key: str, claim: str):
+    # Solo la reserva vigente de esta petición y mientras no tenga respuesta guardada
+    return _where_key(statement, scope, key).where(IdempotencyKey.claim == claim, IdempotencyKey.status.is_(None))
+
+
+class _Reservation:
+    # Petición en curso en este proceso: las repeticiones esperan su evento y renewal renueva el plazo
+
+    def __init__(self, fingerprint: str, claim: str) -> None:
+        self.fingerprint = fingerprint
+        self.claim = claim
+        self.event = asyncio.Event()
+        self.renewal = None
+
+
+class IdempotencyStore:
+
+    def __init__(self, ttl: float, max_keys: int, lease: float, wait_timeout: float) -> None:
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.lease = lease
+        self.wait_timeout = wait_timeout
+        # Peticiones en curso en este proceso (_Reservation): las repeticiones esperan su aviso en lugar de
+        # consultar la tabla
+        self._inflight = {}
+        self._stored = 0
+
+    def _claim(self, scope: str, key: str, fingerprint: str, claim: str) -> Optional[dict]:
+        # Reserva la clave si no existe o si caducó (también un plazo vencido de una petición que nunca
+        # terminó). Devuelve None si la reserva es de esta petición o la fila existente en caso contrario.
+        now = time.time()
+        statement = insert(IdempotencyKey).values(
+            scope=scope, key=key, fingerprint=fingerprint, claim=claim, expires_at=now + self.lease
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+            set_={
+                "fingerprint": statement.excluded.fingerprint,
+                "claim": statement.excluded.claim,
+                "status": None,
+                "media_type": None,
+                "body": None,
+                "expires_at": statement.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at < now,
+        )
+        with engine.begin() as connection:
+            if connection.execute(statement).rowcount:
+                return None
+            row = connection.execute(_where_key(select(*_STORED_COLUMNS), scope, key)).first()
+        # Sin fila: se borró entre las dos sentencias y se intenta de nuevo
+        return row._asdict() if row else {"fingerprint": fingerprint, "status": None}
+
+    def _renew(self, scope: str, key: str, claim: str) -> bool:
+        # False si la reserva ya no es de esta petición (se retomó tras vencer el plazo) o ya terminó
+        statement = _where_claim(IdempotencyKey.__table__.update(), scope, key, claim)
+        with engine.begin() as connection:
+            return bool(connection.execute(statement.values(expires_at=time.time() + self.lease)).rowcount)
+
+    def _complete(self, scope: str, key: str, claim: str, status: int, media_type: str, body: bytes) -> None:
+        statement = _where_claim(IdempotencyKey.__table__.update(), scope, key, claim)
+        with engine.begin() as connection:
+            connection.execute(statement.values(status=status, media_type=media_type, body=body, expires_at=time.time() + self.ttl))
+        self._stored += 1
+        if self._stored % PRUNE_EVERY == 0:
+            self.prune()
+
+    def _release(self, scope: str, key: str, claim: str) -> None:
+        with engine.begin() as connection:
+            connection.execute(_where_claim(delete(IdempotencyKey), scope, key, claim))
+
+    async def _keep_alive(self, scope: str, key: str, claim: str) -> None:
+        # Renueva el plazo cada tercio de IDEMPOTENCY_LEASE: con la base de datos bloqueada se reintenta en
+        # la vuelta siguiente, antes de que venza
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                if not await run_in_threadpool(self._renew, scope, key, claim):
+                    return
+            except OperationalError:
+                continue
+
+    def prune(self) -> None:
+        # Quita las claves caducadas y, si aun así sobran, las respuestas más próximas a caducar
+        with engine.begin() as connection:
+            connection.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < time.time()))
+            excess = connection.execute(select(func.count()).select_from(IdempotencyKey)).scalar() - self.max_keys
+            if excess > 0:
+                connection.execute(_TRIM_SQL, {"excess": excess})
+
+    async def begin(self, scope: str, key: str, fingerprint: str) -> Optional[dict]:
+        # None: esta petición tiene la clave y debe ejecutarse (y después llamar a finish). Si no, devuelve
+        # la fila guardada: una respuesta terminada, otra petición con la misma clave o, si se agotó la
+        # espera, la original todavía en curso (status None).
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            reservation = self._inflight.get((scope, key))
+            if reservation is not None and reservation.fingerprint != fingerprint:
+                return {"fingerprint": reservation.fingerprint, "status": None}
+            if reservation is None:
+                claim = uuid.uuid4().hex
+                stored = await run_in_threadpool(self._claim, scope, key, fingerprint, claim)
+                if stored is None:
+                    reservation = _Reservation(fingerprint, claim)
+                    reservation.renewal = asyncio.create_task(self._keep_alive(scope, key, claim))
+                    self._inflight[(scope, key)] = reservation
+                    return None
+                if stored["fingerprint"] != fingerprint or stored["status"] is not None:
+                    return stored
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return stored if reservation is None else {"fingerprint": fingerprint, "status": None}
+            if reservation is None:
+                await asyncio.sleep(min(POLL_INTERVAL, remaining))
+            else:
+                try:
+                    await asyncio.wait_for(reservation.event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def finish(self, scope: str, key: str, response) -> None:
+        # Los errores 5xx (o una excepción, response None) no se guardan: se libera la clave para reintentar
+        reservation = self._inflight[(scope, key)]
+        reservation.renewal.cancel()
+        try:
+            if response is not None and response.status_code < 500:
+                await run_in_threadpool(
+                    self._complete, scope, key, reservation.claim, response.status_code, response.media_type, bytes(response.body)
+                )
+            else:
+                await run_in_threadpool(self._release, scope, key, reservation.claim)
+        finally:
+            del self._inflight[(scope, key)]
+            reservation.event.set()
+
+idempotency_store = IdempotencyStore(
+    settings.idempotency_ttl, settings.idempotency_max_keys, settings.idempotency_lease, settings.idempotency_wait_timeout
+)
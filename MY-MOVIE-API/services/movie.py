@@ -1,52 +1,329 @@
+import re
+from contextlib import asynccontextmanager
+from typing import List
+from sqlalchemy import delete, insert, select, text, union_all, update
+from starlette.concurrency import run_in_threadpool
+from config import settings
+from config.database import Session, AsyncSession
 from models.movie import Movie as MovieModel
 from schema.movie import Movie
+from services.write_batcher import WriteBatcher
+
+SORT_COLUMNS = {
+    "id": MovieModel.id,
+    "year": MovieModel.year,
+    "title": MovieModel.title,
+}
+
+# Las lecturas seleccionan solo estas columnas y devuelven dicts planos en lugar de instancias ORM:
+# no hay identity map ni _sa_instance_state que construir y se serializan directamente con MovieRow
+MOVIE_COLUMNS = (MovieModel.id, MovieModel.title, MovieModel.overview, MovieModel.year, MovieModel.rating, MovieModel.category)
+
+def _rows(result) -> List[dict]:
+    return [row._asdict() for row in result]
+
+# Las consultas se construyen una sola vez aquí y las ejecutan tanto MovieService como AsyncMovieService
+
+def _page_query(limit: int, after: tuple, sort: str):
+    descending = sort.startswith("-")
+    column = SORT_COLUMNS[sort.lstrip("-")]
+    query = select(*MOVIE_COLUMNS)
+
+    if column is MovieModel.id:
+        order = [column.desc() if descending else column]
+    else:
+        order = [column.desc(), MovieModel.id.desc()] if descending else [column, MovieModel.id]
+
+    # Se pide una fila extra para saber si hay una página siguiente
+    if after is None:
+        return query.order_by(*order).limit(limit + 1), column
+    value, last_id = after
+    after_id = MovieModel.id < last_id if descending else MovieModel.id > last_id
+    if column is MovieModel.id:
+        return query.where(after_id).order_by(*order).limit(limit + 1), column
+
+    # Con (column, id) > (:value, :id) SQLite solo busca por column en el índice y filtra id fila a fila, así
+    # que una página al final de un valor muy repetido recorre todas las filas anteriores de ese valor. Se
+    # separa en dos ramas que buscan por las dos columnas del índice (column, id): el resto de filas con el
+    # mismo valor y, después, las de los valores siguientes.
+    # NULL va antes que cualquier valor en SQLite: en orden descendente las filas con NULL son las últimas.
+    branches = [query.where(column == value, after_id).order_by(order[1]).limit(limit + 1)]
+    if value is not None:
+        branches.append(query.where(column < value if descending else column > value).order_by(*order).limit(limit + 1))
+        if descending:
+            branches.append(query.where(column.is_(None)).order_by(order[1]).limit(limit + 1))
+    elif not descending:
+        branches.append(query.where(column.is_not(None)).order_by(*order).limit(limit + 1))
+    page = union_all(*(select(branch.subquery()) for branch in branches)).subquery()
+    page_order = [page.c[column.key].desc(), page.c.id.desc()] if descending else [page.c[column.key], page.c.id]
+    return select(*page.c).order_by(*page_order).limit(limit + 1), column
+
+def _split_page(result: list, limit: int, column):
+    if len(result) <= limit:
+        return result, None
+    result = result[:limit]
+    last = result[-1]
+    return result, (last[column.key], last["id"])
+
+def _category_query(category: str, year_min: int = None, year_max: int = None, rating_min: float = None, rating_max: float = None):
+    # Cada combinación de filtros queda cubierta por ix_movies_category_year o ix_movies_category_rating
+    query = select(*MOVIE_COLUMNS).where(MovieModel.category == category)
+    if year_min is not None:
+        query = query.where(MovieModel.year >= year_min)
+    if year_max is not None:
+        query = query.where(MovieModel.year <= year_max)
+    if rating_min is not None:
+        query = query.where(MovieModel.rating >= rating_min)
+    if rating_max is not None:
+        query = query.where(MovieModel.rating <= rating_max)
+    return query
+
+_SEARCH_TOKEN = re.compile(r"\w+\*?")
+
+def build_match_query(q: str, max_terms: int = 16) -> str:
+    # Cada palabra se cita para que FTS5 no interprete operadores del usuario; "palabra*" busca por prefijo
+    terms = []
+    for token in _SEARCH_TOKEN.findall(q)[:max_terms]:
+        prefix = token.endswith("*")
+        terms.append('"' + token.rstrip("*") + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+_SEARCH_SQL = """
+    SELECT movies.id, movies.title, movies.overview, movies.year, movies.rating, movies.category,
+           highlight(movies_fts, 0, '<mark>', '</mark>') AS title_highlight,
+           snippet(movies_fts, 1, '<mark>', '</mark>', '…', 16) AS snippet,
+           bm25(movies_fts) AS rank
+    FROM movies_fts JOIN movies ON movies.id = movies_fts.rowid
+    WHERE movies_fts MATCH :match {after}
+    ORDER BY rank, movies.id
+    LIMIT :limit
+"""
+
+def _search_query(match: str, limit: int, after: tuple):
+    # Orden por relevancia BM25 (menor es mejor) y paginación por cursor sobre (rank, id)
+    params = {"match": match, "limit": limit + 1}
+    after_clause = ""
+    if after is not None:
+        params["rank"], params["id"] = after
+        after_clause = "AND (bm25(movies_fts), movies_fts.rowid) > (:rank, :id)"
+    return text(_SEARCH_SQL.format(after=after_clause)), params
+
+def _split_search_page(result: list, limit: int):
+    if len(result) <= limit:
+        return result, None
+    result = result[:limit]
+    return result, (result[-1]["rank"], result[-1]["id"])
+
+def _batch_get_chunks(ids: List[int], chunk_size: int):
+    # Un SELECT ... WHERE id IN (...) por bloque: cada id es un parámetro y SQLite limita cuántos admite
+    for start in range(0, len(ids), chunk_size):
+        yield select(*MOVIE_COLUMNS, MovieModel.version).where(MovieModel.id.in_(ids[start:start + chunk_size]))
+
+_TABLE_VERSION_SQL = text("SELECT version FROM table_versions WHERE name = :name")
+
+def _bulk_insert_query(chunk_size: int):
+    # Un solo INSERT ... VALUES (...), (...) RETURNING por bloque y un único commit para todo el lote.
+    # Los ids los asigna SQLite de forma consecutiva dentro de la transacción, así que ordenarlos
+    # devuelve el mismo orden de entrada sin pedir RETURNING ordenado (que SQLite no agrupa).
+    return insert(MovieModel).returning(MovieModel.id).execution_options(insertmanyvalues_page_size=chunk_size)
+
+def _bulk_rows(movies: List[Movie]) -> List[dict]:
+    return [movie.model_dump(exclude={"id"}) for movie in movies]
+
+# Modificación y borrado en una sola sentencia: RETURNING devuelve la fila resultante (o nada si el id no
+# existe) sin el SELECT previo ni el refresh posterior. values solo lleva las columnas a modificar.
+# if_match limita la sentencia a las versiones indicadas: una escritura obsoleta no afecta a ninguna fila
+# y se detecta sin lectura previa. version se incrementa en el mismo UPDATE.
+def _where_version(statement, if_match):
+    if if_match is None or if_match == "*":
+        return statement
+    return statement.where(MovieModel.version.in_(if_match))
+
+def _update_query(id: int, values: dict, if_match=None):
+    statement = update(MovieModel).where(MovieModel.id == id).values(**values, version=MovieModel.version + 1)
+    return _where_version(statement, if_match).returning(*MOVIE_COLUMNS, MovieModel.version)
+
+def _delete_query(id: int, if_match=None):
+    return _where_version(delete(MovieModel).where(MovieModel.id == id), if_match).returning(MovieModel.id)
+
+def _returned_row(result):
+    row = result.first()
+    return row._asdict() if row else None
 
 class MovieService:
 
     def __init__(self, db) -> None:
         self.db = db
     
-    def get_movies(self):
-        result = self.db.query(MovieModel).all()
-        return result
+    def get_movies(self, limit: int, after: tuple = None, sort: str = "id"):
+        query, column = _page_query(limit, after, sort)
+        result = _rows(self.db.execute(query))
+        return _split_page(result, limit, column)
     
-    def get_movie(self, id):
-        result = self.db.query(MovieModel).filter(MovieModel.id == id).first()
+    def get_table_version(self, name: str = "movies") -> int:
+        return self.db.execute(_TABLE_VERSION_SQL, {"name": name}).scalar() or 0
+
+    def get_movie_row(self, id):
+        result = self.db.execute(select(*MOVIE_COLUMNS, MovieModel.version).where(MovieModel.id == id)).first()
+        return result._asdict() if result else None
+
+    def get_movie_rows(self, ids: List[int], chunk_size: int) -> List[dict]:
+        result = []
+        for query in _batch_get_chunks(ids, chunk_size):
+            result.extend(_rows(self.db.execute(query)))
         return result
-    
-    def get_movie_category(self, category):
-        result = self.db.query(MovieModel).filter(MovieModel.category == category).all()
+
+    def get_movie_category(self, category, **filters):
+        result = _rows(self.db.execute(_category_query(category, **filters)))
         return result
     
+    def search_movies(self, match: str, limit: int, after: tuple = None):
+        query, params = _search_query(match, limit, after)
+        result = _rows(self.db.execute(query, params))
+        return _split_search_page(result, limit)
+
     def create_movie(self, movie: Movie):
-        new_movie = MovieModel(**movie.dict())
+        new_movie = MovieModel(**movie.model_dump())
         self.db.add(new_movie)
         self.db.commit()
         self.db.refresh(new_movie)  # Refresca la instancia para obtener el ID
         return new_movie  # Retorna la instancia creada
     
-    def update_movie(self, id: int, movie: Movie):
-        existing_movie = self.db.query(MovieModel).filter(MovieModel.id == id).first()
-        if not existing_movie:
-            return None
-        
-        existing_movie.title = movie.title
-        existing_movie.overview = movie.overview
-        existing_movie.year = movie.year
-        existing_movie.rating = movie.rating
-        existing_movie.category = movie.category
+    def create_movies(self, movies: List[Movie], chunk_size: int) -> List[int]:
+        try:
+            result = self.db.execute(_bulk_insert_query(chunk_size), _bulk_rows(movies))
+            ids = sorted(result.scalars())
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        return ids
 
+    def update_movie(self, id: int, values: dict, if_match=None):
+        result = _returned_row(self.db.execute(_update_query(id, values, if_match)))
         self.db.commit()
-        self.db.refresh(existing_movie)
-        
-        return existing_movie
+        return result
     
-    def delete_movie(self, id: int):
-        existing_movie = self.db.query(MovieModel).filter(MovieModel.id == id).first()
-        if not existing_movie:
-            return None
-        
-        self.db.delete(existing_movie)
+    def delete_movie(self, id: int, if_match=None):
+        result = _returned_row(self.db.execute(_delete_query(id, if_match)))
         self.db.commit()
-        
-        return existing_movie
+        return result
+
+class AsyncMovieService:
+
+    def __init__(self, db) -> None:
+        self.db = db
+
+    async def get_movies(self, limit: int, after: tuple = None, sort: str = "id"):
+        query, column = _page_query(limit, after, sort)
+        result = _rows(await self.db.execute(query))
+        return _split_page(result, limit, column)
+
+    async def get_table_version(self, name: str = "movies") -> int:
+        return (await self.db.execute(_TABLE_VERSION_SQL, {"name": name})).scalar() or 0
+
+    async def get_movie_row(self, id):
+        result = (await self.db.execute(select(*MOVIE_COLUMNS, MovieModel.version).where(MovieModel.id == id))).first()
+        return result._asdict() if result else None
+
+    async def get_movie_rows(self, ids: List[int], chunk_size: int) -> List[dict]:
+        result = []
+        for query in _batch_get_chunks(ids, chunk_size):
+            result.extend(_rows(await self.db.execute(query)))
+        return result
+
+    async def get_movie_category(self, category, **filters):
+        result = _rows(await self.db.execute(_category_query(category, **filters)))
+        return result
+
+    async def search_movies(self, match: str, limit: int, after: tuple = None):
+        query, params = _search_query(match, limit, after)
+        result = _rows(await self.db.execute(query, params))
+        return _split_search_page(result, limit)
+
+    async def create_movie(self, movie: Movie):
+        new_movie = MovieModel(**movie.model_dump())
+        self.db.add(new_movie)
+        await self.db.commit()
+        await self.db.refresh(new_movie)
+        return new_movie
+
+    async def create_movies(self, movies: List[Movie], chunk_size: int) -> List[int]:
+        try:
+            result = await self.db.execute(_bulk_insert_query(chunk_size), _bulk_rows(movies))
+            ids = sorted(result.scalars())
+            await self.db.commit()
+        except Exception:
+            await self.db.rollback()
+            raise
+        return ids
+
+    async def update_movie(self, id: int, values: dict, if_match=None):
+        result = _returned_row(await self.db.execute(_update_query(id, values, if_match)))
+        await self.db.commit()
+        return result
+
+    async def delete_movie(self, id: int, if_match=None):
+        result = _returned_row(await self.db.execute(_delete_query(id, if_match)))
+        await self.db.commit()
+        return result
+
+# Escrituras individuales para el WriteBatcher: dejan el commit al lote
+
+def _insert_movie(db, movie: Movie):
+    new_movie = MovieModel(**movie.model_dump())
+    db.add(new_movie)
+    db.flush()
+    return new_movie
+
+def _update_movie(db, id: int, values: dict, if_match=None):
+    return _returned_row(db.execute(_update_query(id, values, if_match)))
+
+def _delete_movie(db, id: int, if_match=None):
+    return _returned_row(db.execute(_delete_query(id, if_match)))
+
+def _run_with_session(method, *args, **kwargs):
+    with Session() as db:
+        return method(MovieService(db), *args, **kwargs)
+
+class ThreadedMovieService:
+    # Expone MovieService con la interfaz de AsyncMovieService. Cada llamada abre y cierra su Session
+    # dentro del mismo hilo del threadpool, así ninguna conexión queda retenida esperando un hilo libre.
+
+    def __getattr__(self, name):
+        method = getattr(MovieService, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(_run_with_session, method, *args, **kwargs)
+        return call
+
+class BatchedMovieService:
+    # Envía create/update/delete al WriteBatcher y delega el resto en el servicio del modo configurado
+
+    def __init__(self, service, batcher: WriteBatcher) -> None:
+        self.service = service
+        self.batcher = batcher
+
+    def __getattr__(self, name):
+        return getattr(self.service, name)
+
+    async def create_movie(self, movie: Movie):
+        return await self.batcher.submit(_insert_movie, movie)
+
+    async def update_movie(self, id: int, values: dict, if_match=None):
+        return await self.batcher.submit(_update_movie, id, values, if_match)
+
+    async def delete_movie(self, id: int, if_match=None):
+        return await self.batcher.submit(_delete_movie, id, if_match)
+
+write_batcher = WriteBatcher(settings.write_batch_window_ms, settings.write_batch_max_ops)
+
+@asynccontextmanager
+async def movie_service():
+    if settings.db_mode == "async":
+        async with AsyncSession() as db:
+            service = AsyncMovieService(db)
+            yield BatchedMovieService(service, write_batcher) if settings.write_batch_enabled else service
+    else:
+        service = ThreadedMovieService()
+        yield BatchedMovieService(service, write_batcher) if settings.write_batch_enabled else service
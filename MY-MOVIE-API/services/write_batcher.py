@@ -0,0 +1,108 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from config.database import Session
+
+# Commit en grupo: un único hilo escritor junta las escrituras que llegan dentro de una ventana corta (o
+# hasta max_ops) y las aplica en una sola transacción. Cada operación es una función (db, *args) que corre
+# en su propio SAVEPOINT, así que un fallo solo deshace la suya; el commit (y su fsync) se paga una vez por lote.
+
+_STOP = object()
+
+class WriteBatcher:
+
+    def __init__(self, window_ms: float, max_ops: int) -> None:
+        self.window = window_ms / 1000
+        self.max_ops = max_ops
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.operations = 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    async def submit(self, operation, *args):
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, operation, args))
+        return await asyncio.wrap_future(future)
+
+    def close(self) -> None:
+        # Aplica lo que quede en la cola y detiene el hilo
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "operations": self.operations,
+            "mean_batch_size": round(self.operations / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self, first) -> tuple:
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_ops:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch, stop = self._collect(first)
+            self._apply(batch)
+
+    def _apply(self, batch: list) -> None:
+        results = []
+        try:
+            with Session(expire_on_commit=False) as db:
+                # BEGIN IMMEDIATE toma el bloqueo de escritura al empezar el lote; además, sin una
+                # transacción explícita pysqlite haría que cada RELEASE de SAVEPOINT confirmara por separado
+                db.connection().exec_driver_sql("BEGIN IMMEDIATE")
+                for future, operation, args in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with db.begin_nested():
+                            results.append((future, operation(db, *args), None))
+                    except Exception as e:
+                        results.append((future, None, e))
+                db.commit()
+        except Exception as e:
+            # Si falla el commit (o ya la apertura o el BEGIN) no se aplicó ninguna operación del lote: se
+            # resuelven todas, también las que aún no habían empezado, para que nadie espere para siempre
+            for future, operation, args in batch:
+                if future.done():
+                    continue
+                if future.running() or future.set_running_or_notify_cancel():
+                    future.set_exception(e)
+            return
+
+        self.batches += 1
+        self.operations += len(results)
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
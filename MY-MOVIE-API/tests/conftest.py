@@ -0,0 +1,22 @@
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+
+MOVIE = {"title": "Mi pelicula", "overview": "Descripcion de la pelicula", "year": 2000, "rating": 7.5, "category": "Accion"}
+
+
+@pytest.fixture(scope="session")
+def client():
+    # Como gestor de contexto para que el lifespan cree el esquema en la base de datos temporal
+    with TestClient(app) as client:
+        yield client
+
+
+def login(client) -> dict:
+    token = client.post("/login", json={"email": "admin@gmail.com", "password": "root"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def auth(client):
+    return login(client)
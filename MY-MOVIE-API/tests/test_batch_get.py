@@ -0,0 +1,16 @@
+import pytest
+from tests.conftest import MOVIE
+
+
+def test_batch_get_reports_missing_ids(client, auth):
+    movie_id = client.post("/movies", json=MOVIE).json()["movie_id"]
+    response = client.post("/movies/batch-get", json={"ids": [movie_id, 2 ** 63 - 1, movie_id]}, headers=auth)
+    assert response.status_code == 200
+    body = response.json()
+    assert [movie["id"] for movie in body["movies"]] == [movie_id]
+    assert body["missing"] == [2 ** 63 - 1]
+
+
+@pytest.mark.parametrize("movie_id", [10 ** 20, 2 ** 63, 0, -1])
+def test_batch_get_rejects_ids_out_of_range(client, auth, movie_id):
+    assert client.post("/movies/batch-get", json={"ids": [movie_id]}, headers=auth).status_code == 422
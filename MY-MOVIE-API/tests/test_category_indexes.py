@@ -0,0 +1,26 @@
+import itertools
+import pytest
+from config.database import engine
+from config.migrations import run_migrations
+from services.movie import _category_query
+
+FILTERS = {"year_min": 1990, "year_max": 2010, "rating_min": 5.0, "rating_max": 9.0}
+CATEGORY_INDEXES = ("USING INDEX ix_movies_category_year", "USING INDEX ix_movies_category_rating")
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    run_migrations(engine)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [combination for size in range(len(FILTERS) + 1) for combination in itertools.combinations(FILTERS, size)],
+    ids=lambda filters: "+".join(filters) or "category",
+)
+def test_category_query_uses_index(filters):
+    compiled = _category_query("Drama", **{name: FILTERS[name] for name in filters}).compile(engine)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as connection:
+        plan = " ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, parameters))
+    assert any(index in plan for index in CATEGORY_INDEXES), plan
@@ -0,0 +1,40 @@
+from unittest import mock
+import pytest
+import routers.movie
+from tests.conftest import MOVIE
+from utils import sql_stats
+
+
+@pytest.fixture
+def list_adapter(monkeypatch):
+    adapter = mock.Mock(wraps=routers.movie.movie_list_adapter)
+    monkeypatch.setattr(routers.movie, "movie_list_adapter", adapter)
+    return adapter
+
+
+def test_cached_movie_not_modified_runs_no_sql(client):
+    movie_id = client.post("/movies", json=MOVIE).json()["movie_id"]
+    etag = client.get(f"/movies/{movie_id}").headers["etag"]
+
+    sql_stats.reset()
+    response = client.get(f"/movies/{movie_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert sql_stats.snapshot() == []
+
+
+def test_listing_not_modified_only_reads_table_version(client, auth, list_adapter):
+    client.post("/movies", json=MOVIE)
+    etag = client.get("/movies", headers=auth).headers["etag"]
+    assert list_adapter.dump_json.called
+    list_adapter.dump_json.reset_mock()
+
+    sql_stats.reset()
+    response = client.get("/movies", headers={**auth, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    statements = sql_stats.snapshot()
+    assert len(statements) == 1 and statements[0]["count"] == 1
+    assert "table_versions" in statements[0]["fingerprint"]
+    list_adapter.dump_json.assert_not_called()
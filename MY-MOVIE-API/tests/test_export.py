@@ -0,0 +1,24 @@
+import json
+import pytest
+from sqlalchemy import select
+from config import settings
+from config.database import Session
+from models.movie import Movie as MovieModel
+from tests.conftest import MOVIE
+
+
+@pytest.mark.parametrize("format", ["ndjson", "json"])
+def test_export_reads_every_movie_in_keyset_batches(client, auth, monkeypatch, format):
+    for _ in range(5):
+        client.post("/movies", json=MOVIE)
+    with Session() as db:
+        ids = db.execute(select(MovieModel.id).order_by(MovieModel.id)).scalars().all()
+    monkeypatch.setattr(settings, "export_batch_size", 2)
+
+    response = client.get("/movies/export", params={"format": format}, headers=auth)
+    assert response.status_code == 200
+    if format == "ndjson":
+        movies = [json.loads(line) for line in response.text.splitlines()]
+    else:
+        movies = response.json()
+    assert [movie["id"] for movie in movies] == ids
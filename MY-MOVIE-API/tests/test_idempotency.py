@@ -0,0 +1,78 @@
+import asyncio
+import uuid
+import pytest
+from fastapi.responses import JSONResponse
+from services.idempotency import IdempotencyStore
+from tests.conftest import MOVIE
+
+
+@pytest.fixture
+def key(client):
+    # client: el lifespan ya creó la tabla idempotency_keys en la base de datos de pruebas
+    return uuid.uuid4().hex
+
+
+def store(lease: float = 30, wait_timeout: float = 0) -> IdempotencyStore:
+    # Cada instancia tiene su propio registro de peticiones en curso, como un worker distinto
+    return IdempotencyStore(ttl=60, max_keys=1000, lease=lease, wait_timeout=wait_timeout)
+
+
+def test_retry_replays_the_stored_response(client, key):
+    first = client.post("/movies", json=MOVIE, headers={"Idempotency-Key": key})
+    retry = client.post("/movies", json=MOVIE, headers={"Idempotency-Key": key})
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_key_reused_with_another_body_is_rejected(client, key):
+    assert client.post("/movies", json=MOVIE, headers={"Idempotency-Key": key}).status_code == 201
+    other = dict(MOVIE, title="Otra pelicula")
+    assert client.post("/movies", json=other, headers={"Idempotency-Key": key}).status_code == 422
+
+
+def test_duplicate_waits_for_the_request_in_flight(key):
+    worker = store(wait_timeout=5)
+
+    async def run():
+        assert await worker.begin("POST /movies", key, "huella") is None
+        duplicate = asyncio.create_task(worker.begin("POST /movies", key, "huella"))
+        await asyncio.sleep(0.1)
+        assert not duplicate.done()
+        await worker.finish("POST /movies", key, JSONResponse(status_code=201, content={"movie_id": 1}))
+        return await duplicate
+
+    stored = asyncio.run(run())
+    assert stored["status"] == 201
+    assert stored["body"] == b'{"movie_id":1}'
+
+
+def test_slow_request_keeps_its_claim_past_the_lease(key):
+    worker, other = store(lease=0.3), store(lease=0.3)
+
+    async def run():
+        assert await worker.begin("POST /movies", key, "huella") is None
+        await asyncio.sleep(0.9)
+        stolen = await other.begin("POST /movies", key, "huella")
+        await worker.finish("POST /movies", key, JSONResponse(status_code=201, content={"movie_id": 1}))
+        return stolen
+
+    assert asyncio.run(run()) == {"fingerprint": "huella", "status": None, "media_type": None, "body": None}
+    assert asyncio.run(other.begin("POST /movies", key, "huella"))["status"] == 201
+
+
+def test_expired_claim_cannot_overwrite_the_new_one(key):
+    worker, other = store(lease=0.3), store(lease=0.3)
+
+    async def run():
+        assert await worker.begin("POST /movies", key, "huella") is None
+        # El worker deja de renovar (como si se hubiera colgado) y otro retoma la clave al vencer el plazo
+        worker._inflight[("POST /movies", key)].renewal.cancel()
+        await asyncio.sleep(0.4)
+        assert await other.begin("POST /movies", key, "huella") is None
+        await worker.finish("POST /movies", key, JSONResponse(status_code=201, content={"movie_id": 1}))
+        await other.finish("POST /movies", key, JSONResponse(status_code=201, content={"movie_id": 2}))
+
+    asyncio.run(run())
+    assert asyncio.run(store().begin("POST /movies", key, "huella"))["body"] == b'{"movie_id":2}'
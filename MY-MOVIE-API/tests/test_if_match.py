@@ -0,0 +1,18 @@
+import pytest
+from tests.conftest import MOVIE
+
+
+@pytest.mark.parametrize("tag", ['"v999999999999999999999999"', '"v9223372036854775808"', '"v0"'])
+def test_if_match_with_unknown_version_fails_precondition(client, tag):
+    movie_id = client.post("/movies", json=MOVIE).json()["movie_id"]
+    response = client.patch(f"/movies/{movie_id}", json={"year": 2001}, headers={"If-Match": tag})
+    assert response.status_code == 412
+    assert client.delete(f"/movies/{movie_id}", headers={"If-Match": tag}).status_code == 412
+
+
+def test_if_match_with_current_version_updates(client):
+    movie_id = client.post("/movies", json=MOVIE).json()["movie_id"]
+    etag = client.get(f"/movies/{movie_id}").headers["etag"]
+    response = client.patch(f"/movies/{movie_id}", json={"year": 2001}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
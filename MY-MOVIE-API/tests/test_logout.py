@@ -0,0 +1,32 @@
+import pytest
+from jwt.exceptions import InvalidTokenError
+from tests.conftest import login
+from utils.jwt_manager import create_token, revoke_token, token_cache, validate_token, verify_token
+
+
+def test_logout_revokes_token_for_every_worker(client):
+    auth = login(client)
+    assert client.get("/movies", headers=auth).status_code == 200
+
+    assert client.post("/logout", headers=auth).status_code == 200
+    assert client.get("/movies", headers=auth).status_code == 403
+    # Otro worker (o este tras reiniciar) no tiene el token en caché: la revocación sale de la base de datos
+    token_cache.clear()
+    assert client.get("/movies", headers=auth).status_code == 403
+    assert client.get("/movies", headers=login(client)).status_code == 200
+
+
+def test_logout_during_verification_is_not_cached_back(client, monkeypatch):
+    token = create_token({"email": "admin@gmail.com"})
+    store = token_cache.set
+
+    def set_after_logout(*args, **kwargs):
+        # El logout se confirma entre la consulta a revoked_tokens y el guardado en caché
+        monkeypatch.setattr(token_cache, "set", store)
+        revoke_token(token)
+        store(*args, **kwargs)
+
+    monkeypatch.setattr(token_cache, "set", set_after_logout)
+    verify_token(token)
+    with pytest.raises(InvalidTokenError):
+        validate_token(token)
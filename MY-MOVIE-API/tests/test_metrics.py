@@ -0,0 +1,25 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from starlette.responses import PlainTextResponse
+from config import settings
+from middlewares.admission import AdmissionMiddleware
+from middlewares.metrics import MetricsMiddleware
+from utils.admission import AdmissionLimiter
+
+
+def requests_count(route: str, status: str) -> float:
+    labels = {"method": "GET", "route": route, "status": status}
+    return REGISTRY.get_sample_value("movie_api_http_request_duration_seconds_count", labels) or 0
+
+
+def test_requests_shed_by_admission_are_labelled_rejected(monkeypatch):
+    # Sin métricas al construirlo para no sustituir los limitadores que publica la aplicación
+    monkeypatch.setattr(settings, "metrics_enabled", False)
+    admission = AdmissionMiddleware(PlainTextResponse("ok"))
+    admission.limiters["read"] = AdmissionLimiter(limit=0, queue_size=0, timeout=0)
+    before = requests_count("rejected", "503")
+
+    response = TestClient(MetricsMiddleware(admission)).get("/movies")
+    assert response.status_code == 503
+    assert requests_count("rejected", "503") == before + 1
+    assert requests_count("unmatched", "503") == 0
@@ -0,0 +1,69 @@
+import pytest
+from config.database import Session, engine
+from models.movie import Movie as MovieModel
+from services.movie import MovieService, _page_query
+from utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize("sort, value, id", [
+    ("id", 10, 10), ("-year", 1999, 7), ("title", "Mi pelicula", 3), ("year", None, 4), ("search", -1.5, 2),
+])
+def test_cursor_round_trip(sort, value, id):
+    assert decode_cursor(encode_cursor(sort, value, id), sort) == (value, id)
+
+
+@pytest.mark.parametrize("sort, value, id", [
+    ("year", {"a": 1}, 3), ("year", "1999", 3), ("year", True, 3), ("title", 5, 3), ("search", "x", 3),
+    ("search", float("nan"), 3), ("id", 1, 10 ** 30), ("year", 10 ** 30, 1), ("id", 1, 1.5), ("id", 1, None),
+])
+def test_forged_cursor_is_rejected(sort, value, id):
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(sort, value, id), sort)
+
+
+def test_cursor_for_other_sort_is_rejected():
+    with pytest.raises(ValueError, match="orden"):
+        decode_cursor(encode_cursor("year", 1999, 3), "title")
+
+
+@pytest.mark.parametrize("cursor", [["year", {"a": 1}, 3], ["id", 1, 10 ** 30]])
+def test_forged_cursor_returns_400(client, auth, cursor):
+    sort = cursor[0]
+    response = client.get("/movies", params={"sort": sort, "after": encode_cursor(*cursor)}, headers=auth)
+    assert response.status_code == 400
+
+
+@pytest.fixture(scope="module")
+def movies(client):
+    # Años muy repetidos y algunos NULL, que SQLite ordena antes que cualquier valor
+    rows = [
+        {"title": f"Pelicula {i % 7}" if i % 11 else None, "overview": "Descripcion de la pelicula", "year": 2000 + i % 3 if i % 13 else None,
+         "rating": 5.0, "category": "Accion"}
+        for i in range(120)
+    ]
+    with engine.begin() as connection:
+        connection.execute(MovieModel.__table__.insert(), rows)
+
+
+@pytest.mark.parametrize("sort", ["id", "-id", "year", "-year", "title", "-title"])
+def test_keyset_pages_follow_sort_order(movies, sort):
+    column, direction = sort.lstrip("-"), "DESC" if sort.startswith("-") else "ASC"
+    with engine.connect() as connection:
+        expected = connection.exec_driver_sql(f"SELECT id FROM movies ORDER BY {column} {direction}, id {direction}").scalars().all()
+    seen, key = [], None
+    with Session() as db:
+        service = MovieService(db)
+        while True:
+            page, key = service.get_movies(7, key, sort)
+            seen += [row["id"] for row in page]
+            if key is None:
+                break
+    assert seen == expected
+
+
+def test_keyset_page_seeks_both_index_columns():
+    compiled = _page_query(10, (2001, 50), "year")[0].compile(engine)
+    parameters = tuple(compiled.params[name] for name in compiled.positiontup)
+    with engine.connect() as connection:
+        plan = [row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + compiled.string, parameters)]
+    assert any("ix_movies_year_id (year=? AND id>?)" in step for step in plan), plan
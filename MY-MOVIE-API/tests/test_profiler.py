@@ -0,0 +1,15 @@
+import os
+import time
+from utils import profiler
+
+
+def test_save_keeps_only_the_newest_profiles(tmp_path):
+    saved = []
+    past = time.time() - 100
+    for index in range(5):
+        profile = profiler.RequestProfile(0.001)
+        path = profiler.save(profile, str(tmp_path), max_files=3)
+        os.utime(path, (past + index, past + index))  # mtime distinto aunque el reloj no avance
+        saved.append(profile.id)
+    remaining = [entry["id"] for entry in profiler.list_profiles(str(tmp_path))]
+    assert remaining == saved[:1:-1]
@@ -0,0 +1,68 @@
+import asyncio
+import sqlite3
+import pytest
+from sqlalchemy.exc import OperationalError
+import services.write_batcher
+from schema.movie import Movie
+from services.movie import _delete_movie, _insert_movie
+from services.write_batcher import WriteBatcher
+from tests.conftest import MOVIE
+
+
+@pytest.fixture
+def batcher(client):
+    # client: el lifespan ya creó el esquema en la base de datos de pruebas
+    batcher = WriteBatcher(window_ms=20, max_ops=64)
+    yield batcher
+    batcher.close()
+
+
+def submit_all(batcher, *operations):
+    async def run():
+        return await asyncio.gather(*(batcher.submit(*operation) for operation in operations), return_exceptions=True)
+    return asyncio.run(run())
+
+
+def test_concurrent_writes_share_one_commit(batcher):
+    results = submit_all(batcher, *[(_insert_movie, Movie(**MOVIE)) for _ in range(10)])
+    assert len({movie.id for movie in results}) == 10
+    assert batcher.stats()["operations"] == 10
+    assert batcher.stats()["batches"] < 10
+
+
+def test_failed_operation_only_rolls_back_its_savepoint(batcher):
+    def failing(db):
+        _insert_movie(db, Movie(**MOVIE))
+        raise ValueError("falla")
+
+    created, error, deleted = submit_all(batcher, (_insert_movie, Movie(**MOVIE)), (failing,), (_delete_movie, 10 ** 9))
+    assert created.id is not None
+    assert isinstance(error, ValueError)
+    assert deleted is None
+
+
+class LockedSession:
+    # Como una Session cuando otra conexión retiene el bloqueo de escritura más allá de busy_timeout
+    def __init__(self, **kwargs) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def connection(self):
+        raise OperationalError("BEGIN IMMEDIATE", {}, sqlite3.OperationalError("database is locked"))
+
+
+def test_batch_that_cannot_begin_fails_every_caller(batcher, monkeypatch):
+    monkeypatch.setattr(services.write_batcher, "Session", LockedSession)
+
+    async def run():
+        operations = [batcher.submit(_insert_movie, Movie(**MOVIE)) for _ in range(5)]
+        return await asyncio.wait_for(asyncio.gather(*operations, return_exceptions=True), timeout=5)
+
+    results = asyncio.run(run())
+    assert len(results) == 5
+    assert all(isinstance(result, OperationalError) for result in results)
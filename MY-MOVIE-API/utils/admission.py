@@ -0,0 +1,91 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+# Limitador de concurrencia con cola acotada para el control de admisión (middlewares.admission). Vive en el
+# bucle de eventos del worker: no necesita bloqueos porque acquire y release nunca se ejecutan a la vez.
+
+BACKOFF = 0.9  # Reducción multiplicativa del límite adaptativo cuando la latencia supera el objetivo
+
+
+class AdmissionLimiter:
+
+    def __init__(self, limit: int, queue_size: int, timeout: float, target_latency: float = None) -> None:
+        self.max_limit = limit
+        self.limit = float(limit)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.target_latency = target_latency  # None: límite fijo
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+        self._waiters = deque()
+        self._next_decrease = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        # None si la petición se admite; si no, el motivo del rechazo
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await asyncio.wait((future,), timeout=self.timeout)
+        except BaseException:
+            # Cliente desconectado mientras esperaba: si ya se le había cedido un hueco, se devuelve
+            if future.done() and not future.cancelled():
+                self.release(None)
+            else:
+                self._waiters.remove(future)
+                future.cancel()
+            raise
+        if not future.done():
+            self._waiters.remove(future)
+            future.cancel()
+            self.rejected["timeout"] += 1
+            return "timeout"
+        self.admitted += 1
+        return None
+
+    def release(self, latency: Optional[float]) -> None:
+        # latency es el tiempo hasta el inicio de la respuesta (sin la espera en cola); None si no la hubo
+        if latency is not None:
+            self._adjust(latency)
+        self.in_flight -= 1
+        # El hueco pasa directamente al primero de la cola (in_flight se mantiene)
+        while self._waiters and self.in_flight < int(self.limit):
+            self.in_flight += 1
+            self._waiters.popleft().set_result(None)
+
+    def _adjust(self, latency: float) -> None:
+        # AIMD: +1 por cada "límite" peticiones dentro del objetivo, x0.9 si se supera. Las respuestas lentas
+        # de una misma ráfaga solo cuentan una vez por intervalo objetivo, así el límite no se desploma.
+        if self.target_latency is None:
+            return
+        if latency > self.target_latency:
+            now = time.monotonic()
+            if now >= self._next_decrease:
+                self.limit = max(1.0, self.limit * BACKOFF)
+                self._next_decrease = now + self.target_latency
+        elif self.limit < self.max_limit:
+            self.limit = min(float(self.max_limit), self.limit + 1 / self.limit)
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
@@ -0,0 +1,128 @@
+import itertools
+import math
+import random
+import sqlite3
+
+# Catálogo sintético con distribuciones realistas para pruebas de carga. Todos los valores respetan las
+# restricciones de schema.movie.Movie (título 1-50, sinopsis 15-200, año <= 2024, rating 1-10).
+
+# Ordenadas de más a menos frecuente: el peso de la categoría k es 1 / k^s (Zipf)
+CATEGORIES = (
+    "Drama", "Comedia", "Accion", "Terror", "Thriller", "Romance", "Animacion", "Documental",
+    "Ciencia ficcion", "Aventura", "Fantasia", "Crimen", "Musical", "Western", "Biografia",
+)
+ZIPF_EXPONENT = 1.1
+
+WORDS = (
+    "noche", "ciudad", "sombra", "viaje", "guerra", "amor", "secreto", "fuego", "mar", "último", "regreso",
+    "dragón", "tiempo", "sangre", "silencio", "reino", "camino", "hermanos", "verano", "invierno", "lobo",
+    "estrella", "frontera", "memoria", "corazón", "isla", "tormenta", "destino", "ciego", "perdido",
+)
+OVERVIEW_WORDS = WORDS + (
+    "una", "familia", "descubre", "que", "su", "pasado", "esconde", "un", "misterio", "mientras", "el",
+    "pueblo", "se", "enfrenta", "a", "la", "amenaza", "de", "nuevo", "dos", "amigos", "deben", "huir",
+)
+
+FIRST_YEAR = 1920
+LAST_YEAR = 2024
+
+
+def _cumulative(weights) -> list:
+    return list(itertools.accumulate(weights))
+
+
+def category_weights(exponent: float = ZIPF_EXPONENT) -> list:
+    return _cumulative(1 / rank ** exponent for rank in range(1, len(CATEGORIES) + 1))
+
+
+def generate_movies(count: int, seed: int = 42, pool_size: int = 50000):
+    # Tuplas (title, overview, year, rating, category). La misma semilla produce el mismo catálogo.
+    # Cada columna se muestrea de una vez con random.choices sobre su distribución discreta (en C), así
+    # que el bucle por fila solo recorta la sinopsis: un millón de filas se genera en pocos segundos.
+    rng = random.Random(seed)
+
+    # Más estrenos recientes que antiguos: distancia a LAST_YEAR exponencial con media de 12 años
+    years = range(FIRST_YEAR, LAST_YEAR + 1)
+    year_weights = _cumulative(math.exp(-(LAST_YEAR - year) / 12) for year in years)
+    # Calificaciones normales en torno a 6.3 (pasos de 0.1) y un 2 % de películas sin calificar
+    ratings = [None] + [round(1 + step / 10, 1) for step in range(91)]
+    rating_weights = _cumulative([0.02 * sum(math.exp(-((r - 6.3) / 1.3) ** 2 / 2) for r in ratings[1:])]
+                                 + [math.exp(-((r - 6.3) / 1.3) ** 2 / 2) for r in ratings[1:]])
+    # Sinopsis con longitud log-normal (mediana ~90 caracteres) dentro de los límites del esquema
+    lengths = range(15, 201)
+    length_weights = _cumulative(math.exp(-(math.log(length / 90) / 0.4) ** 2 / 2) / length for length in lengths)
+
+    titles = []
+    for _ in range(pool_size):
+        title = " ".join(rng.choices(WORDS, k=rng.randint(1, 4))).capitalize()
+        if rng.random() < 0.08:
+            title += f" {rng.randint(2, 5)}"  # Secuelas
+        titles.append(title[:50])
+    # Las sinopsis son fragmentos de un texto largo que empiezan y terminan en un límite de palabra
+    text = " ".join(rng.choices(OVERVIEW_WORDS, k=pool_size * 4)) + " "
+    starts = [0] + [index + 1 for index, char in enumerate(text) if char == " "][:-60]
+
+    columns = (
+        rng.choices(titles, k=count),
+        rng.choices(starts, k=count),
+        rng.choices(lengths, cum_weights=length_weights, k=count),
+        rng.choices(years, cum_weights=year_weights, k=count),
+        rng.choices(ratings, cum_weights=rating_weights, k=count),
+        rng.choices(CATEGORIES, cum_weights=category_weights(), k=count),
+    )
+    for title, start, length, year, rating, category in zip(*columns):
+        end = text.rfind(" ", start, start + length + 1)
+        if end - start < 15:
+            end = text.find(" ", start + 15)  # Palabras largas: se alarga hasta el siguiente límite
+        overview = text[start:end]
+        yield title, overview.capitalize(), year, rating, category
+
+
+_INSERT_SQL = "INSERT INTO movies (title, overview, year, rating, category) VALUES (?, ?, ?, ?, ?)"
+
+# Ajustes solo para la conexión de carga: nadie más escribe mientras tanto y, si falla, la transacción
+# entera se deshace, así que no hace falta sincronizar a disco en cada página
+_LOAD_PRAGMAS = {
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "cache_size": -262144,  # 256 MiB
+    "locking_mode": "EXCLUSIVE",
+}
+
+
+def load_catalog(database_path: str, movies, replace: bool = False, batch_size: int = 50000) -> int:
+    # Carga masiva directa en SQLite, todo en una transacción: se quitan los índices secundarios y los
+    # triggers de movies, se insertan las filas y se recrean los índices de una vez (más rápido que
+    # mantenerlos fila a fila). Después se reconstruye movies_fts y se avanza table_versions.
+    connection = sqlite3.connect(database_path, isolation_level=None)
+    try:
+        for name, value in _LOAD_PRAGMAS.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        connection.execute("BEGIN IMMEDIATE")
+        deferred = connection.execute(
+            "SELECT type, name, sql FROM sqlite_master "
+            "WHERE tbl_name = 'movies' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+        ).fetchall()
+        for kind, name, _ in deferred:
+            connection.execute(f'DROP {kind.upper()} "{name}"')
+        if replace:
+            connection.execute("DELETE FROM movies")
+
+        count = 0
+        movies = iter(movies)
+        while batch := list(itertools.islice(movies, batch_size)):
+            connection.executemany(_INSERT_SQL, batch)
+            count += len(batch)
+
+        for _, _, sql in deferred:
+            connection.execute(sql)
+        connection.execute("INSERT INTO movies_fts(movies_fts) VALUES ('rebuild')")
+        connection.execute("UPDATE table_versions SET version = version + 1 WHERE name = 'movies'")
+        connection.execute("COMMIT")
+    except BaseException:
+        if connection.in_transaction:
+            connection.execute("ROLLBACK")
+        raise
+    finally:
+        connection.close()
+    return count
@@ -0,0 +1,55 @@
+import hashlib
+import re
+from fastapi import Request
+from fastapi.responses import Response
+from utils.pagination import INT64_MAX
+
+_VERSION_TAG = re.compile(r'"v(\d{1,19})(?:-gzip)?"')
+
+
+def version_etag(version: int) -> str:
+    # El ETag de una película es su columna version: If-Match se puede comprobar dentro del UPDATE
+    return f'"v{version}"'
+
+
+def listing_etag(name: str, version: int, request: Request) -> str:
+    # Cada ruta y combinación de parámetros (página, filtros, orden) es una representación distinta
+    query = hashlib.sha1(f"{request.url.path}?{request.url.query}".encode()).hexdigest()[:16]
+    return f'"{name}-{version}-{query}"'
+
+
+def gzip_etag(etag: str) -> str:
+    # La variante gzip es otra representación y necesita su propio ETag fuerte
+    return etag[:-1] + '-gzip"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match usa comparación débil: se ignoran el prefijo W/ y la variante de codificación
+    for tag in header.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == etag or tag == gzip_etag(etag):
+            return True
+    return False
+
+
+def if_match_versions(request: Request):
+    # None: sin If-Match; "*": cualquier versión existente; si no, la lista de versiones aceptadas
+    header = request.headers.get("if-match")
+    if header is None:
+        return None
+    if header.strip() == "*":
+        return "*"
+    # If-Match usa comparación fuerte: las etiquetas W/ y las que no son de versión no coinciden nunca
+    # Las versiones que no caben en un INTEGER de SQLite no pueden existir: se descartan (412) en vez de
+    # llegar al UPDATE como parámetro
+    versions = (int(match.group(1)) for tag in header.split(",") if (match := _VERSION_TAG.fullmatch(tag.strip())))
+    return [version for version in versions if version <= INT64_MAX]
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
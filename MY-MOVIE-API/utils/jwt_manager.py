@@ -1,9 +1,72 @@
+import hashlib
+import secrets
+import time
+from typing import Optional
 from jwt import encode, decode
+from jwt.exceptions import InvalidTokenError
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert
+from config import settings
+from config.database import engine
+from models.revoked_token import RevokedToken
+from utils.cache import LRUCache
+
+# Claims de tokens ya verificados: evita repetir base64 + JSON + HMAC (y la consulta de revocación)
+# cuando el mismo cliente envía el mismo token en cada petición
+token_cache = LRUCache(settings.token_cache_size, settings.token_cache_ttl)
+
+# Las revocaciones se guardan en la tabla revoked_tokens, compartida por todos los workers y persistente
+# entre reinicios. Cada worker solo la consulta al verificar un token que no tiene en caché: una revocación
+# hecha en otro worker se aplica como mucho TOKEN_CACHE_TTL segundos después.
+
+def _digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
 
 def create_token(data: dict) -> str:
-    token: str = encode(payload=data, key="my_secret_key", algorithm="HS256")
+    # jti hace único cada token: revocar uno no puede afectar a un login posterior del mismo usuario.
+    # exp limita cuánto tiempo hay que recordar una revocación.
+    now = int(time.time())
+    payload = {**data, "iat": now, "exp": now + int(settings.token_ttl), "jti": secrets.token_hex(16)}
+    token: str = encode(payload=payload, key="my_secret_key", algorithm="HS256")
     return token
 
-def validate_token(token: str) -> dict:
+def cached_claims(token: str) -> Optional[dict]:
+    data = token_cache.get(_digest(token))
+    return None if data is None else dict(data)
+
+def verify_token(token: str) -> dict:
+    # Verificación completa (firma, caducidad y revocación); el resultado se guarda en token_cache
+    digest = _digest(token)
     data: dict = decode(token, key="my_secret_key", algorithms=['HS256'])
-    return data
\ No newline at end of file
+    # Si un logout invalida la caché entre la consulta y el set, el resultado (ya obsoleto) no se guarda
+    generation = token_cache.generation
+    with engine.connect() as connection:
+        revoked = connection.execute(select(RevokedToken.digest).where(RevokedToken.digest == digest.hex())).first()
+    if revoked:
+        raise InvalidTokenError("Token revocado")
+    # Una entrada nunca sobrevive a la expiración del propio token
+    ttl = settings.token_cache_ttl
+    if "exp" in data:
+        ttl = min(ttl, data["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(digest, data, generation, ttl=ttl)
+    return dict(data)
+
+def validate_token(token: str) -> dict:
+    data = cached_claims(token)
+    return data if data is not None else verify_token(token)
+
+def revoke_token(token: str) -> None:
+    digest = _digest(token)
+    try:
+        exp = decode(token, key="my_secret_key", algorithms=['HS256']).get("exp")
+    except InvalidTokenError:
+        token_cache.invalidate(digest)
+        return  # Inválido o caducado: decode() ya lo rechaza, no hace falta recordarlo
+    statement = insert(RevokedToken).values(digest=digest.hex(), expires_at=exp).on_conflict_do_nothing()
+    with engine.begin() as connection:
+        # Los tokens ya caducados no hace falta recordarlos (los emitidos sin exp se guardan sin caducidad)
+        connection.execute(delete(RevokedToken).where(RevokedToken.expires_at < time.time()))
+        connection.execute(statement)
+    # Después del commit: una verificación que leyó revoked_tokens antes ya no puede volver a cachearlo
+    token_cache.invalidate(digest)
@@ -0,0 +1,147 @@
+import atexit
+import os
+import time
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+# Métricas en formato Prometheus. Con varios workers de uvicorn se define PROMETHEUS_MULTIPROC_DIR (un
+# directorio vacío al arrancar): cada proceso escribe sus valores en ficheros mmap de ese directorio y
+# /metrics los agrega todos, responda el worker que responda.
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+http_request_duration = Histogram(
+    "movie_api_http_request_duration_seconds",
+    "Duración de las peticiones HTTP por ruta (plantilla), método y estado",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+http_requests_in_progress = Gauge(
+    "movie_api_http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+sql_statement_duration = Histogram(
+    "movie_api_sql_statement_duration_seconds",
+    "Duración de las sentencias SQL por tipo (el _count es el número de sentencias)",
+    ("operation",),
+    buckets=SQL_BUCKETS,
+)
+threadpool_busy = Gauge(
+    "movie_api_threadpool_busy_threads",
+    "Hilos del threadpool de anyio ocupados",
+    multiprocess_mode="livesum",
+)
+threadpool_waiting = Gauge(
+    "movie_api_threadpool_queue_depth",
+    "Tareas esperando un hilo libre del threadpool de anyio",
+    multiprocess_mode="livesum",
+)
+threadpool_size = Gauge(
+    "movie_api_threadpool_size",
+    "Tamaño del threadpool de anyio",
+    multiprocess_mode="livesum",
+)
+cache_hits = Gauge("movie_api_cache_hits", "Aciertos de caché", ("cache",), multiprocess_mode="livesum")
+cache_misses = Gauge("movie_api_cache_misses", "Fallos de caché", ("cache",), multiprocess_mode="livesum")
+cache_entries = Gauge("movie_api_cache_entries", "Entradas en caché", ("cache",), multiprocess_mode="livesum")
+# La proporción no se puede sumar entre procesos: se publica por pid (la global es hits / (hits + misses))
+cache_hit_ratio = Gauge("movie_api_cache_hit_ratio", "Proporción de aciertos de caché", ("cache",), multiprocess_mode="liveall")
+admission_limit = Gauge("movie_api_admission_limit", "Límite de concurrencia del control de admisión", ("class",), multiprocess_mode="livesum")
+admission_in_flight = Gauge("movie_api_admission_in_flight", "Peticiones admitidas en curso", ("class",), multiprocess_mode="livesum")
+admission_queue_depth = Gauge("movie_api_admission_queue_depth", "Peticiones esperando admisión", ("class",), multiprocess_mode="livesum")
+admission_rejections = Gauge(
+    "movie_api_admission_rejections", "Peticiones rechazadas con 503 (cola llena o espera agotada)", ("class", "reason"),
+    multiprocess_mode="livesum",
+)
+
+SQL_OPERATIONS = frozenset(("SELECT", "INSERT", "UPDATE", "DELETE", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA"))
+
+# Cachés registradas por nombre (utils.cache.LRUCache); sus contadores se copian a los gauges
+_caches = {}
+# Limitadores del control de admisión por clase de ruta (utils.admission.AdmissionLimiter)
+_limiters = {}
+_next_refresh = 0.0
+REFRESH_INTERVAL = 5.0
+
+
+# labels() valida y bloquea en cada llamada: los hijos ya creados se reutilizan desde un dict
+_request_children = {}
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    key = (method, route, status)
+    child = _request_children.get(key)
+    if child is None:
+        child = _request_children[key] = http_request_duration.labels(method, route, str(status))
+    child.observe(seconds)
+
+
+def observe_statement(statement: str, seconds: float) -> None:
+    # Solo el verbo como etiqueta: las huellas completas dispararían la cardinalidad
+    words = statement.lstrip()[:9].split(None, 1)
+    operation = words[0].upper() if words else ""
+    if operation not in SQL_OPERATIONS:
+        operation = "OTHER"
+    sql_statement_duration.labels(operation).observe(seconds)
+
+
+def register_cache(name: str, cache) -> None:
+    _caches[name] = cache
+
+
+def register_limiter(name: str, limiter) -> None:
+    _limiters[name] = limiter
+
+
+def refresh_gauges() -> None:
+    # Estado del threadpool, de las cachés y del control de admisión del proceso actual. Se llama al generar
+    # /metrics y, como mucho cada REFRESH_INTERVAL segundos, desde el middleware, así los demás workers
+    # también lo publican.
+    global _next_refresh
+    _next_refresh = time.monotonic() + REFRESH_INTERVAL
+    try:
+        from anyio import to_thread
+        limiter = to_thread.current_default_thread_limiter()
+    except RuntimeError:
+        limiter = None  # Fuera de un bucle de eventos
+    if limiter is not None:
+        statistics = limiter.statistics()
+        threadpool_busy.set(statistics.borrowed_tokens)
+        threadpool_waiting.set(statistics.tasks_waiting)
+        threadpool_size.set(statistics.total_tokens)
+    for name, cache in _caches.items():
+        stats = cache.stats()
+        cache_hits.labels(name).set(stats["hits"])
+        cache_misses.labels(name).set(stats["misses"])
+        cache_entries.labels(name).set(stats["size"])
+        cache_hit_ratio.labels(name).set(stats["hit_ratio"])
+    for name, limiter in _limiters.items():
+        stats = limiter.stats()
+        admission_limit.labels(name).set(stats["limit"])
+        admission_in_flight.labels(name).set(stats["in_flight"])
+        admission_queue_depth.labels(name).set(stats["queue_depth"])
+        for reason, count in stats["rejected"].items():
+            admission_rejections.labels(name, reason).set(count)
+
+
+def maybe_refresh_gauges() -> None:
+    if time.monotonic() >= _next_refresh:
+        refresh_gauges()
+
+
+def render() -> tuple:
+    refresh_gauges()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+if MULTIPROCESS:
+    # Los gauges "live*" dejan de contar los procesos que terminan
+    atexit.register(multiprocess.mark_process_dead, os.getpid())
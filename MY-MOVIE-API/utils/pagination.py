@@ -0,0 +1,43 @@
+import base64
+import json
+import math
+
+# Límites de INTEGER en SQLite: un valor fuera de rango no se puede enlazar como parámetro
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+
+
+def _is_int64(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool) and INT64_MIN <= value <= INT64_MAX
+
+
+def _is_number(value) -> bool:
+    return _is_int64(value) or (isinstance(value, float) and math.isfinite(value))
+
+
+# Tipo del valor de ordenación de cada cursor. year y title admiten None porque las columnas admiten NULL.
+_VALUE_CHECKS = {
+    "id": _is_int64,
+    "year": lambda value: value is None or _is_int64(value),
+    "title": lambda value: value is None or isinstance(value, str),
+    "search": _is_number,  # Rango BM25
+}
+
+
+def encode_cursor(sort: str, value, id: int) -> str:
+    raw = json.dumps([sort, value, id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+    if cursor_sort != sort:
+        raise ValueError("El cursor no corresponde a este orden")
+    # El cursor viene del cliente: sus valores llegan a SQLite como parámetros y se validan antes
+    if not _is_int64(id) or not _VALUE_CHECKS[sort.lstrip("-")](value):
+        raise ValueError("Cursor inválido")
+    return value, id
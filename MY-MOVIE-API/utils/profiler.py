@@ -0,0 +1,130 @@
+import contextvars
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+
+# Perfilado estadístico de una petición: un hilo muestrea sys._current_frames() cada intervalo y se queda
+# solo con las pilas que pertenecen a la petición perfilada:
+# - en el bucle de eventos, las que pasan por el frame de profiled_call de esta petición;
+# - en el threadpool de anyio, las del hilo que ejecuta una llamada cuyo contexto lleva este perfil
+#   (anyio copia el contexto de la petición al hilo, así se ven los handlers y servicios síncronos).
+# El resultado se guarda en formato "collapsed stacks" (una pila por línea, frames separados por ";" y el
+# número de muestras al final), que leen flamegraph.pl, speedscope o inferno.
+
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+try:
+    from anyio._backends._asyncio import WorkerThread
+    _WORKER_CODE = WorkerThread.run.__code__
+except (ImportError, AttributeError):
+    _WORKER_CODE = None  # Otra versión de anyio: solo se muestrea el bucle de eventos
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{16}$")
+
+
+async def profiled_call(profile, app, scope, receive, send):
+    # Su frame marca la base de la pila de la petición en el bucle de eventos
+    await app(scope, receive, send)
+
+
+_MARKER_CODE = profiled_call.__code__
+
+
+def _label(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+
+    def __init__(self, interval: float) -> None:
+        self.id = secrets.token_hex(8)
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = 0.0
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name=f"profiler-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self._started
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = self._request_stack(frame)
+                if stack is not None:
+                    self.counts[stack] += 1
+                    self.samples += 1
+
+    def _request_stack(self, frame):
+        labels = []
+        while frame is not None:
+            code = frame.f_code
+            if code is _MARKER_CODE:
+                if frame.f_locals.get("profile") is not self:
+                    return None
+                labels.append("event_loop")
+                return ";".join(reversed(labels))
+            if code is _WORKER_CODE:
+                context = frame.f_locals.get("context")
+                if context is None or context.get(current_profile) is not self:
+                    return None
+                labels.append("threadpool")
+                return ";".join(reversed(labels))
+            labels.append(_label(code))
+            frame = frame.f_back
+        return None
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+def save(profile: RequestProfile, directory: str, max_files: int) -> str:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{profile.id}.collapsed")
+    with open(path, "w") as file:
+        file.write(profile.collapsed())
+    # Con muestreo aleatorio se guardan perfiles sin parar: solo se conservan los max_files más recientes
+    for stale in list_profiles(directory)[max_files:]:
+        try:
+            os.remove(os.path.join(directory, f"{stale['id']}.collapsed"))
+        except FileNotFoundError:
+            pass  # Otro worker lo borró antes
+    return path
+
+
+def list_profiles(directory: str) -> list:
+    if not os.path.isdir(directory):
+        return []
+    result = []
+    for entry in os.scandir(directory):
+        name, extension = os.path.splitext(entry.name)
+        if extension == ".collapsed" and PROFILE_ID.match(name):
+            stat = entry.stat()
+            result.append({"id": name, "size": stat.st_size, "created": stat.st_mtime})
+    return sorted(result, key=lambda item: item["created"], reverse=True)
+
+
+def read_profile(directory: str, profile_id: str):
+    if not PROFILE_ID.match(profile_id):
+        return None
+    try:
+        with open(os.path.join(directory, f"{profile_id}.collapsed")) as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,37 @@
+from typing import List
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from config import settings
+from schema.movie import MovieRow, SearchRow
+from utils.compression import accepts_gzip, gzip_compress
+from utils.etag import gzip_etag
+
+movie_adapter = TypeAdapter(MovieRow)
+movie_list_adapter = TypeAdapter(List[MovieRow])
+search_list_adapter = TypeAdapter(List[SearchRow])
+
+
+class CachedBody:
+    # Cuerpo JSON ya serializado junto a su ETag y cabeceras. La variante gzip se calcula la primera vez
+    # que un cliente la pide y se reutiliza: un listado popular se comprime una sola vez.
+    __slots__ = ("body", "etag", "headers", "_gzip")
+
+    def __init__(self, body: bytes, etag: str, headers: dict = None) -> None:
+        self.body = body
+        self.etag = etag
+        self.headers = headers or {}
+        self._gzip = None
+
+    def gzip(self) -> bytes:
+        if self._gzip is None:
+            self._gzip = gzip_compress(self.body, settings.gzip_level)
+        return self._gzip
+
+    def response(self, request: Request) -> Response:
+        headers = {**self.headers, "Vary": "Accept-Encoding"}
+        if len(self.body) >= settings.gzip_minimum_size and accepts_gzip(request.headers.get("accept-encoding", "")):
+            headers.update({"ETag": gzip_etag(self.etag), "Content-Encoding": "gzip"})
+            return Response(content=self.gzip(), media_type="application/json", headers=headers)
+        headers["ETag"] = self.etag
+        return Response(content=self.body, media_type="application/json", headers=headers)
@@ -0,0 +1,99 @@
+import json
+import logging
+import random
+import re
+import threading
+import time
+from sqlalchemy import event
+from config import settings
+
+if settings.metrics_enabled:
+    from utils import metrics
+
+logger = logging.getLogger("movie_api.sql")
+
+_stats = {}
+_lock = threading.Lock()
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_REPEATED_GROUPS = re.compile(r"(\([?, ]*\))(?:, \([?, ]*\))+")
+_REPEATED_PARAMS = re.compile(r"\?(?:, \?)+")
+
+
+def fingerprint(statement: str) -> str:
+    # Misma huella para sentencias que solo difieren en literales, en el tamaño de una lista IN
+    # o en el número de filas de un INSERT ... VALUES agrupado
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _LITERALS.sub("?", statement)
+    statement = _REPEATED_GROUPS.sub(r"\1, ...", statement)
+    return _REPEATED_PARAMS.sub("?, ...", statement)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_sql_stats_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if settings.metrics_enabled:
+        metrics.observe_statement(statement, elapsed)
+    elapsed_ms = elapsed * 1000
+    key = fingerprint(statement)
+
+    with _lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0}
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        if elapsed_ms > entry["max_ms"]:
+            entry["max_ms"] = elapsed_ms
+        slow = elapsed_ms >= settings.sql_slow_query_ms
+        if slow:
+            entry["slow"] += 1
+
+    if slow or (settings.sql_log_sample_rate and random.random() < settings.sql_log_sample_rate):
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            json.dumps({
+                "event": "slow_query" if slow else "sampled_query",
+                "duration_ms": round(elapsed_ms, 3),
+                "fingerprint": key,
+                "rows": cursor.rowcount,
+                "executemany": executemany,
+            }),
+        )
+
+
+def install(engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def snapshot() -> list:
+    with _lock:
+        items = [(key, dict(entry)) for key, entry in _stats.items()]
+    result = []
+    for key, entry in items:
+        entry["fingerprint"] = key
+        entry["mean_ms"] = round(entry["total_ms"] / entry["count"], 3)
+        entry["total_ms"] = round(entry["total_ms"], 3)
+        entry["max_ms"] = round(entry["max_ms"], 3)
+        result.append(entry)
+    return sorted(result, key=lambda entry: entry["total_ms"], reverse=True)
+
+
+def reset() -> None:
+    with _lock:
+        _stats.clear()